@@ -1,19 +1,22 @@
 
 from flask import Flask, request, jsonify
-import google.generativeai as genai
+import sys
 import os
 from flask_cors import CORS
 import base64
 import io
 from datetime import datetime
 
+# The LLM client is shared with the backend agents
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from shared.llm.gemini import get_model, generate_content_sync, INTERACTIVE
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Configure the Gemini API with your API key
-# In production, use environment variables for API keys
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY", "your-api-key-here"))
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client, configured from GEMINI_API_KEY (or LLM_API_URL)
+model = get_model()
 
 @app.route('/generate', methods=['POST'])
 def generate():
@@ -115,9 +118,12 @@ def generate():
         else:
             return jsonify({"success": False, "error": f"Unsupported action: {action}"}), 400
         
+        if model is None:
+            return jsonify({"success": False, "error": "GEMINI_API_KEY is not configured"}), 503
+        
         try:
-            # Generate content using the Gemini model
-            response = model.generate_content(prompt)
+            # Every request here has a user waiting on it
+            response = generate_content_sync(model, prompt, priority=INTERACTIVE)
             
             # Format the response to match the expected format
             response_text = response.text
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Header, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import sys
 import os
@@ -6,16 +7,39 @@ import os
 # Add parent directories to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from shared.database.connection import init_database, close_database, get_courses_collection, get_chapters_collection
-from shared.models.schemas import Course, Chapter, CourseGenerationRequest, CourseGenerationResponse, APIResponse
-import google.generativeai as genai
-import json
+from shared.database.connection import (
+    init_database, close_database, db_manager, MONGODB_TRANSACTIONS,
+    get_courses_collection, get_chapters_collection, get_flashcards_collection, get_mcqs_collection, get_qnas_collection,
+    get_course_sections_collection,
+    get_jobs_collection, get_course_content_cache_collection
+)
+from shared.database.projection import build_projection, InvalidFieldsError
+from shared.database.pagination import paginate, InvalidCursorError, DEFAULT_PAGE_SIZE
+from shared.llm.gemini import get_model, get_llm_stats, generate_content_async, stream_content_async
+from shared.llm.json_output import parse_llm_json
+from shared.llm.stream_parser import JsonArrayItemStream
+from shared.jobs.queue import JobQueue
+from shared.utils.serialization import dumps, DocumentResponse
+from shared.utils.zipstream import ZipStream
+from shared.utils.http_client import get_http_client, close_http_client
+from shared.events.hub import EventHub
+from shared.models.schemas import (
+    Course, Chapter, CourseGenerationRequest, CourseGenerationResponse, APIResponse,
+    GeneratedCourse, GeneratedChapter, GeneratedCourseOutline, GeneratedChapterBody,
+    GeneratedFlashcardSet, GeneratedMCQSet, GeneratedQnASet
+)
 import asyncio
-from datetime import datetime
-from bson import ObjectId
+import functools
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional
 import uuid
+import httpx
+from pymongo.errors import OperationFailure, PyMongoError
 
-app = FastAPI(title="Course Generation Agent", version="1.0.0")
+app = FastAPI(title="Course Generation Agent", version="1.0.0", default_response_class=DocumentResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,48 +49,242 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Gemini
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client; None when no model is configured
+model = get_model()
+
+# Gateway that caches course reads and must hear about status changes
+GATEWAY_URL = os.getenv("GATEWAY_URL", "http://api-gateway:8000")
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+# Job type drained by worker.py
+COURSE_GENERATION_JOB = "course_generation"
+
+# Generated-course cache; bump COURSE_PROMPT_VERSION whenever a prompt changes
+COURSE_PROMPT_VERSION = "2"
+# The single course prompt ("stream" and "single" modes) and the outline/section pipeline
+# produce differently shaped content, so each keeps its own cache entries
+SINGLE_PROMPT = "single"
+PIPELINE_PROMPTS = "pipeline"
+COURSE_CACHE_TTL_SECONDS = int(os.getenv("COURSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# "pipeline" generates an outline and then every section in parallel, "stream" streams the
+# single-prompt course and stores chapters as they arrive, "single" waits for the whole course
+COURSE_GENERATION_MODE = os.getenv("COURSE_GENERATION_MODE", "pipeline")
+# Section prompts of one course that may be in flight at once (LLM_MAX_CONCURRENCY caps the process)
+COURSE_PIPELINE_CONCURRENCY = int(os.getenv("COURSE_PIPELINE_CONCURRENCY", "6"))
+# Generated sections stored outside the course document: one document per course in
+# course_sections, or one document per item in a collection of their own
+COURSE_DOCUMENT_SECTIONS = ("mainContent", "notebook", "mindMap", "resources", "assessments")
+COURSE_COLLECTION_SECTIONS = {
+    "chapters": get_chapters_collection,
+    "flashcards": get_flashcards_collection,
+    "mcqs": get_mcqs_collection,
+    "qnas": get_qnas_collection
+}
+
+# Courses read per query, and other documents per cursor batch, while exporting
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "100"))
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "zip": "application/zip"}
+# Zip entry of each exported collection; the rest are named <collection>.ndjson
+EXPORT_ZIP_FILES = {"courses": "course.json", "course_sections": "sections.json"}
+
+# Distinct (topic, purpose, difficulty) fallback courses kept in memory
+FALLBACK_CACHE_SIZE = int(os.getenv("FALLBACK_CACHE_SIZE", "256"))
+
+# Where /events gets course progress from: "change_stream" watches MongoDB (needs a replica
+# set), "pubsub" relies on workers posting events here, "auto" tries change streams first
+COURSE_EVENTS_SOURCE = os.getenv("COURSE_EVENTS_SOURCE", "auto")
+# This agent, as seen by worker processes that post events to it in pubsub mode
+COURSE_EVENTS_URL = os.getenv("COURSE_EVENTS_URL", "http://course-generation:8001")
+# Idle /events streams send a comment this often so proxies keep the connection open
+COURSE_EVENTS_HEARTBEAT = float(os.getenv("COURSE_EVENTS_HEARTBEAT", "15"))
+
+# Subscribers of /events, keyed by course id
+course_event_hub = EventHub()
+# "pubsub" or "change_stream" in the API process once it has started; None in workers
+course_events_mode = None
+course_events_task = None
 
 @app.on_event("startup")
 async def startup_event():
+    global course_events_mode, course_events_task
     await init_database()
+    # Until a change stream is open, events are published in-process
+    course_events_mode = "pubsub"
+    if COURSE_EVENTS_SOURCE != "pubsub":
+        course_events_task = asyncio.create_task(watch_course_changes())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if course_events_task:
+        course_events_task.cancel()
+    await close_http_client()
     await close_database()
 
-def serialize_doc(doc):
-    """Convert MongoDB document to JSON serializable format"""
-    if doc is None:
-        return None
-    if isinstance(doc, list):
-        return [serialize_doc(d) for d in doc]
-    if isinstance(doc, dict):
-        result = {}
-        for key, value in doc.items():
-            if key == "_id":
-                result["id"] = str(value)
-            elif isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, datetime):
-                result[key] = value.isoformat()
-            elif isinstance(value, dict):
-                result[key] = serialize_doc(value)
-            elif isinstance(value, list):
-                result[key] = serialize_doc(value)
-            else:
-                result[key] = value
-        return result
-    return doc
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    if INTERNAL_API_TOKEN and x_internal_token != INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
 
-async def generate_course_content_with_ai(topic: str, purpose: str, difficulty: str):
-    """Generate enhanced course content with mind maps and notebook features using Gemini AI"""
+def chapter_event(chapter: dict) -> dict:
+    return {
+        "event": "chapter",
+        "data": {
+            "course_id": chapter["course_id"],
+            "chapter_id": chapter["_id"],
+            "title": chapter["title"],
+            "order_number": chapter["order_number"]
+        }
+    }
+
+def status_event(course_id: str, status: str, message: Optional[str] = None) -> dict:
+    return {"event": "status", "data": {"course_id": course_id, "status": status, "message": message}}
+
+async def watch_course_changes():
+    """Publish chapter inserts and course status changes from a MongoDB change stream
+    
+    Falls back to pubsub mode when the deployment cannot open change streams.
+    """
+    global course_events_mode
+    pipeline = [{
+        "$match": {
+            "ns.coll": {"$in": ["courses", "chapters"]},
+            "operationType": {"$in": ["insert", "update", "replace"]}
+        }
+    }]
+    resume_token = None
+    retry_delay = 1.0
+    while True:
+        try:
+            async with db_manager.database.watch(pipeline, resume_after=resume_token) as stream:
+                if course_events_mode != "change_stream":
+                    course_events_mode = "change_stream"
+                    print("Course events: publishing from MongoDB change streams")
+                retry_delay = 1.0
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    try:
+                        publish_course_change(change)
+                    except Exception as e:
+                        # One malformed event must not end the watcher
+                        print(f"Skipping course change {change.get('operationType')}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if course_events_mode != "change_stream" and COURSE_EVENTS_SOURCE == "auto":
+                # Standalone servers have no oplog to stream from
+                course_events_mode = "pubsub"
+                print(f"Course events: change streams unavailable ({e}), using in-process pub/sub")
+                return
+            print(f"Course change stream failed: {e}")
+            resume_token = None
+        except PyMongoError as e:
+            print(f"Course change stream interrupted: {e}")
+        await asyncio.sleep(retry_delay)
+        retry_delay = min(retry_delay * 2, 30.0)
+
+def publish_course_change(change: dict):
+    if change["ns"]["coll"] == "chapters":
+        if change["operationType"] == "insert":
+            chapter = change["fullDocument"]
+            course_event_hub.publish(chapter["course_id"], chapter_event(chapter))
+        return
     
-    prompt = f"""
+    course_id = change["documentKey"]["_id"]
+    if change["operationType"] in ("insert", "replace"):
+        content = change["fullDocument"].get("content") or {}
+    else:
+        updated = change["updateDescription"]["updatedFields"]
+        if "content" in updated:
+            content = updated["content"] or {}
+        elif "content.status" in updated:
+            content = {"status": updated["content.status"], "message": updated.get("content.message")}
+        else:
+            # Progress messages alone are covered by chapter events
+            return
+    if content.get("status"):
+        course_event_hub.publish(course_id, status_event(course_id, content["status"], content.get("message")))
+
+async def notify_course_status(course_id: str, status: str, chapter: Optional[dict] = None, message: Optional[str] = None):
+    """Tell the gateway a course changed status so it can drop cached reads, and publish the
+    matching /events event when change streams are not doing it"""
+    event = chapter_event(chapter) if chapter else status_event(course_id, status, message)
+    if course_events_mode == "pubsub":
+        course_event_hub.publish(course_id, event)
+    
+    client = get_http_client()
+    try:
+        await client.post(
+            f"{GATEWAY_URL}/internal/courses/{course_id}/status",
+            json={"status": status},
+            headers={"X-Internal-Token": INTERNAL_API_TOKEN},
+        )
+    except httpx.HTTPError as e:
+        print(f"Failed to notify gateway about course {course_id}: {e}")
+    
+    # Worker processes hand the event to the API process, which publishes it if it is in pubsub mode
+    if course_events_mode is None and COURSE_EVENTS_SOURCE != "change_stream":
+        try:
+            await client.post(
+                f"{COURSE_EVENTS_URL}/internal/courses/{course_id}/events",
+                content=dumps(event),
+                headers={"X-Internal-Token": INTERNAL_API_TOKEN, "Content-Type": "application/json"},
+            )
+        except httpx.HTTPError as e:
+            print(f"Failed to publish event for course {course_id}: {e}")
+
+def normalise_course_request(topic: str, purpose: str, difficulty: str):
+    """Canonical form of a course request, so "React Hooks " and "react  hooks" share a cache entry"""
+    topic = unicodedata.normalize("NFKC", topic).casefold()
+    topic = re.sub(r"[^\w\s+#.-]", " ", topic)
+    topic = " ".join(topic.split())
+    return topic, purpose.strip().lower(), difficulty.strip().lower()
+
+def course_cache_key(topic: str, purpose: str, difficulty: str, prompts: str) -> str:
+    normalised = "|".join((COURSE_PROMPT_VERSION, prompts) + normalise_course_request(topic, purpose, difficulty))
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+def configured_course_prompts() -> str:
+    """Prompts the worker will generate new courses with under COURSE_GENERATION_MODE"""
+    return PIPELINE_PROMPTS if COURSE_GENERATION_MODE == "pipeline" else SINGLE_PROMPT
+
+async def find_cached_course_content(topic: str, purpose: str, difficulty: str, prompts: str):
+    """Return previously generated content for an equivalent request, if still fresh"""
+    try:
+        cache_collection = await get_course_content_cache_collection()
+        entry = await cache_collection.find_one({
+            "_id": course_cache_key(topic, purpose, difficulty, prompts),
+            "expires_at": {"$gt": datetime.utcnow()}
+        })
+    except Exception as e:
+        print(f"Course cache lookup failed: {e}")
+        return None
+    return entry["parsed_content"] if entry else None
+
+async def store_cached_course_content(topic: str, purpose: str, difficulty: str, prompts: str, parsed_content: dict):
+    """Cache AI-generated content; fallback content is never cached"""
+    normalised_topic, normalised_purpose, normalised_difficulty = normalise_course_request(topic, purpose, difficulty)
+    try:
+        cache_collection = await get_course_content_cache_collection()
+        await cache_collection.replace_one(
+            {"_id": course_cache_key(topic, purpose, difficulty, prompts)},
+            {
+                "topic": normalised_topic,
+                "purpose": normalised_purpose,
+                "difficulty": normalised_difficulty,
+                "prompt_version": COURSE_PROMPT_VERSION,
+                "prompts": prompts,
+                "parsed_content": parsed_content,
+                "created_at": datetime.utcnow(),
+                "expires_at": datetime.utcnow() + timedelta(seconds=COURSE_CACHE_TTL_SECONDS)
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Failed to cache course content: {e}")
+
+def build_course_prompt(topic: str, purpose: str, difficulty: str) -> str:
+    """Prompt asking Gemini for the complete course as a single JSON document"""
+    return f"""
     You are an expert curriculum designer AI for StudyMate Agentic LMS platform. Generate a comprehensive course on "{topic}" for {purpose} preparation at {difficulty} level.
 
     The output MUST be a single, valid JSON object with structured learning aids. Do not include any text outside of the JSON.
@@ -260,18 +478,18 @@ async def generate_course_content_with_ai(topic: str, purpose: str, difficulty:
     - Mind map should have at least 3 main branches with 2-3 levels of depth
     """
 
+async def generate_course_content_with_ai(topic: str, purpose: str, difficulty: str):
+    """Generate enhanced course content with mind maps and notebook features using Gemini AI"""
+    cached_content = await find_cached_course_content(topic, purpose, difficulty, SINGLE_PROMPT)
+    if cached_content:
+        return cached_content
+    
+    prompt = build_course_prompt(topic, purpose, difficulty)
     try:
-        if GEMINI_API_KEY and model:
-            response = model.generate_content(prompt)
-            content_text = response.text.strip()
-            
-            # Clean up the response to extract JSON
-            if content_text.startswith("```json"):
-                content_text = content_text[7:]
-            if content_text.endswith("```"):
-                content_text = content_text[:-3]
-            
-            parsed_content = json.loads(content_text)
+        if model:
+            response = await generate_content_async(model, prompt)
+            parsed_content = parse_llm_json(response.text, GeneratedCourse)
+            await store_cached_course_content(topic, purpose, difficulty, SINGLE_PROMPT, parsed_content)
             return parsed_content
         else:
             # Fallback content for development
@@ -280,8 +498,316 @@ async def generate_course_content_with_ai(topic: str, purpose: str, difficulty:
         print(f"Error generating content with AI: {e}")
         return generate_fallback_content(topic, purpose, difficulty)
 
-def generate_fallback_content(topic: str, purpose: str, difficulty: str):
-    """Generate enhanced fallback content with mind maps and notebook features when AI is not available"""
+async def stream_course_content_with_ai(course_id: str, topic: str, purpose: str, difficulty: str):
+    """Stream course content from Gemini, storing each chapter as soon as it has been received
+
+    Returns the parsed content and whether its chapters are already stored.
+    """
+    cached_content = await find_cached_course_content(topic, purpose, difficulty, SINGLE_PROMPT)
+    if cached_content:
+        return cached_content, False
+    
+    courses_collection = await get_courses_collection()
+    chapters_collection = await get_chapters_collection()
+    
+    # A retried job may have stored some chapters before failing
+    await chapters_collection.delete_many({"course_id": course_id})
+    
+    chapter_stream = JsonArrayItemStream("chapters", GeneratedChapter)
+    chapters_stored = 0
+    try:
+        async for chunk in stream_content_async(model, build_course_prompt(topic, purpose, difficulty)):
+            for chapter_data in chapter_stream.feed(chunk):
+                chapters_stored += 1
+                chapter = build_chapter_doc(course_id, chapter_data, chapters_stored)
+                await chapters_collection.insert_one(chapter)
+                await courses_collection.update_one(
+                    {"_id": course_id},
+                    {
+                        "$set": {
+                            "content.chapters_ready": chapters_stored,
+                            "content.message": f"Generated {chapters_stored} chapter(s), continuing...",
+                            "content.last_updated": datetime.utcnow()
+                        }
+                    }
+                )
+                await notify_course_status(course_id, "chapter_ready", chapter=chapter)
+        
+        parsed_content = chapter_stream.result(GeneratedCourse)
+    except Exception as e:
+        print(f"Error streaming content with AI: {e}")
+        return generate_fallback_content(topic, purpose, difficulty), False
+    
+    await store_cached_course_content(topic, purpose, difficulty, SINGLE_PROMPT, parsed_content)
+    return parsed_content, chapters_stored == len(parsed_content.get("chapters", []))
+
+def build_outline_prompt(topic: str, purpose: str, difficulty: str) -> str:
+    """Prompt for stage one of the pipeline: a short plan of the course"""
+    return f"""
+    You are an expert curriculum designer AI for StudyMate Agentic LMS platform. Plan a course on "{topic}" for {purpose} preparation at {difficulty} level.
+
+    The output MUST be a single, valid JSON object. Do not include any text outside of the JSON.
+    Only plan the course here; the content of each chapter is written separately.
+
+    {{
+        "topic": "{topic}",
+        "summary": "A brief 2-3 sentence summary of what the course covers",
+        "introduction": "An engaging introduction to the topic with real-world context",
+        "chapters": [
+            {{
+                "title": "Chapter 1 Title",
+                "order_number": 1,
+                "duration_minutes": 30,
+                "learning_objectives": ["Specific objective 1", "Specific objective 2"],
+                "outline": "2-3 sentences on what this chapter covers"
+            }}
+        ]
+    }}
+
+    Plan at least 3 chapters that build on each other.
+    """
+
+def build_section_prompt(topic: str, purpose: str, difficulty: str, outline: dict, task: str, schema: str) -> str:
+    """Prompt for one section of the course, given the outline from stage one"""
+    chapter_titles = ", ".join(chapter.get("title", "") for chapter in outline.get("chapters", []))
+    return f"""
+    You are an expert curriculum designer AI for StudyMate Agentic LMS platform, writing part of a course on "{topic}" for {purpose} preparation at {difficulty} level.
+
+    Course summary: {outline.get("summary", "")}
+    Chapters: {chapter_titles}
+
+    {task}
+
+    The output MUST be a single, valid JSON object with exactly this structure. Do not include any text outside of the JSON.
+    {schema}
+    """
+
+def build_chapter_prompt(topic: str, purpose: str, difficulty: str, outline: dict, chapter_plan: dict) -> str:
+    return build_section_prompt(
+        topic, purpose, difficulty, outline,
+        f"""Write chapter {chapter_plan.get("order_number")}: "{chapter_plan.get("title")}".
+    Chapter plan: {chapter_plan.get("outline", "")}
+    Learning objectives: {"; ".join(chapter_plan.get("learning_objectives", []))}""",
+        """{
+        "content": "Comprehensive chapter content with markdown formatting and examples",
+        "examples": ["Real example 1", "Real example 2"],
+        "key_points": ["Key insight 1", "Key insight 2"],
+        "mindMapSection": {
+            "name": "Chapter Topic",
+            "children": [
+                {"name": "Key Concept 1", "children": [{"name": "Detail 1.1"}, {"name": "Detail 1.2"}]}
+            ]
+        }
+    }"""
+    )
+
+# Stage-two sections besides the chapters: (name, task, JSON shape in the prompt, schema the output is checked against)
+COURSE_PIPELINE_SECTIONS = [
+    (
+        "mainContent",
+        "Write the main content sections of the course, with practical examples and code.",
+        """{
+        "sections": [
+            {
+                "title": "Section title",
+                "content": "Detailed explanation with practical examples and applications",
+                "examples": ["Real example 1 with code/scenario", "Real example 2 with implementation"],
+                "keyPoints": ["Key insight 1", "Key insight 2"],
+                "codeSnippets": [
+                    {"language": "javascript|python|sql|etc", "code": "// Practical code example", "explanation": "What this code demonstrates"}
+                ]
+            }
+        ]
+    }""",
+        None
+    ),
+    (
+        "notebook",
+        "Write notebook-style learning aids: key concepts, practical analogies and tips.",
+        """{
+        "keyConcepts": [
+            {"term": "Technical Term", "definition": "Clear, concise definition with context", "importance": "Why this concept matters", "examples": ["Example usage"]}
+        ],
+        "analogies": [
+            {"concept": "Complex technical concept", "analogy": "Simple real-world comparison", "explanation": "How the analogy maps to the technical concept"}
+        ],
+        "practicalTips": ["Actionable tip", "Best practice", "Common pitfall to avoid"]
+    }""",
+        None
+    ),
+    (
+        "flashcards",
+        "Write at least 15 flashcards covering the whole course.",
+        """{
+        "flashcards": [
+            {"question": "What is the key difference between X and Y?", "answer": "Concise but complete answer with context", "difficulty": "easy|medium|hard", "category": "concepts|implementation|theory|practice"}
+        ]
+    }""",
+        GeneratedFlashcardSet
+    ),
+    (
+        "mcqs",
+        "Write at least 15 multiple choice questions covering the whole course.",
+        """{
+        "mcqs": [
+            {"question": "Which approach is best for solving X problem?", "options": ["Option A", "Option B", "Option C", "Option D"], "correct_answer": "Option A", "explanation": "Why this is correct and the others are wrong", "difficulty": "easy|medium|hard"}
+        ]
+    }""",
+        GeneratedMCQSet
+    ),
+    (
+        "qnas",
+        "Write at least 8 open questions with detailed practical answers.",
+        """{
+        "qnas": [
+            {"question": "How would you handle X situation in real-world projects?", "answer": "Detailed practical answer with examples, considerations, and best practices"}
+        ]
+    }""",
+        GeneratedQnASet
+    ),
+    (
+        "mindMap",
+        "Write a mind map of the course with at least 3 main branches and 2-3 levels of depth, plus learning resources and assessments.",
+        """{
+        "mindMap": {
+            "root": {
+                "name": "Topic",
+                "type": "root",
+                "children": [
+                    {"name": "Core Concepts", "type": "concept", "children": [{"name": "Principle", "type": "principle", "children": [{"name": "Detail", "type": "detail"}]}]}
+                ]
+            }
+        },
+        "resources": [
+            {"title": "Resource title", "type": "documentation|tutorial|video|book", "url": "https://...", "description": "What it offers", "difficulty": "easy|medium|hard"}
+        ],
+        "assessments": {
+            "quizzes": [{"title": "Chapter 1 Quick Check", "questions": ["question_id_1"], "estimated_minutes": 10}],
+            "projects": [{"title": "Project title", "description": "Apply what you've learned", "requirements": ["Requirement 1"], "estimated_hours": 5}]
+        }
+    }""",
+        None
+    ),
+]
+
+async def generate_json_section(prompt: str, semaphore: asyncio.Semaphore, schema=None) -> dict:
+    async with semaphore:
+        response = await generate_content_async(model, prompt)
+    return parse_llm_json(response.text, schema)
+
+async def generate_course_content_pipeline(course_id: str, topic: str, purpose: str, difficulty: str):
+    """Generate an outline, then every chapter and section concurrently, storing chapters as they finish
+
+    Returns the assembled content and whether its chapters are already stored.
+    """
+    cached_content = await find_cached_course_content(topic, purpose, difficulty, PIPELINE_PROMPTS)
+    if cached_content:
+        return cached_content, False
+    
+    try:
+        response = await generate_content_async(model, build_outline_prompt(topic, purpose, difficulty))
+        outline = parse_llm_json(response.text, GeneratedCourseOutline)
+        chapter_plans = outline["chapters"]
+    except Exception as e:
+        print(f"Error generating course outline with AI: {e}")
+        return generate_fallback_content(topic, purpose, difficulty), False
+    
+    courses_collection = await get_courses_collection()
+    chapters_collection = await get_chapters_collection()
+    
+    # A retried job may have stored some chapters before failing
+    await chapters_collection.delete_many({"course_id": course_id})
+    
+    semaphore = asyncio.Semaphore(COURSE_PIPELINE_CONCURRENCY)
+    chapters_stored = 0
+    
+    async def generate_chapter(order_number: int, chapter_plan: dict):
+        nonlocal chapters_stored
+        chapter_plan.setdefault("order_number", order_number)
+        written = await generate_json_section(build_chapter_prompt(topic, purpose, difficulty, outline, chapter_plan), semaphore, GeneratedChapterBody)
+        chapter_data = {
+            "title": chapter_plan["title"],
+            "content": written["content"],
+            "order_number": chapter_plan["order_number"],
+            "duration_minutes": chapter_plan.get("duration_minutes", 30),
+            "learning_objectives": chapter_plan.get("learning_objectives", []),
+            "examples": written.get("examples", []),
+            "key_points": written.get("key_points", []),
+            "mindMapSection": written.get("mindMapSection", {})
+        }
+        
+        chapter = build_chapter_doc(course_id, chapter_data, order_number)
+        await chapters_collection.insert_one(chapter)
+        chapters_stored += 1
+        await courses_collection.update_one(
+            {"_id": course_id},
+            {
+                "$set": {
+                    "content.chapters_ready": chapters_stored,
+                    "content.message": f"Generated {chapters_stored} of {len(chapter_plans)} chapters, continuing...",
+                    "content.last_updated": datetime.utcnow()
+                }
+            }
+        )
+        await notify_course_status(course_id, "chapter_ready", chapter=chapter)
+        return chapter_data
+    
+    chapter_tasks = [generate_chapter(order_number, plan) for order_number, plan in enumerate(chapter_plans, start=1)]
+    section_tasks = [
+        generate_json_section(build_section_prompt(topic, purpose, difficulty, outline, task, schema), semaphore, output_schema)
+        for _, task, schema, output_schema in COURSE_PIPELINE_SECTIONS
+    ]
+    results = await asyncio.gather(*chapter_tasks, *section_tasks, return_exceptions=True)
+    chapter_results = list(results[:len(chapter_tasks)])
+    section_results = dict(zip([name for name, _, _, _ in COURSE_PIPELINE_SECTIONS], results[len(chapter_tasks):]))
+    
+    # A failed chapter fails the attempt so the job is retried; other sections fall back individually
+    for result in chapter_results:
+        if isinstance(result, Exception):
+            raise result
+    
+    fallback = None
+    def section(name: str) -> dict:
+        # Sections the model failed on are taken from the fallback course instead
+        nonlocal fallback
+        result = section_results[name]
+        if not isinstance(result, Exception):
+            return result
+        print(f"Error generating course section {name} with AI: {result}")
+        if fallback is None:
+            fallback = generate_fallback_content(topic, purpose, difficulty)
+        if name == "mainContent":
+            return fallback["mainContent"]
+        if name == "notebook":
+            return fallback["notebook"]
+        if name == "mindMap":
+            return {key: fallback[key] for key in ("mindMap", "resources", "assessments")}
+        return {name: fallback[name]}
+    
+    mind_map = section("mindMap")
+    parsed_content = {
+        "topic": outline.get("topic", topic),
+        "summary": outline.get("summary", f"Course on {topic}"),
+        "mainContent": {
+            "introduction": outline.get("introduction", ""),
+            "sections": section("mainContent").get("sections", [])
+        },
+        "chapters": chapter_results,
+        "notebook": section("notebook"),
+        "flashcards": section("flashcards").get("flashcards", []),
+        "mcqs": section("mcqs").get("mcqs", []),
+        "qnas": section("qnas").get("qnas", []),
+        "mindMap": mind_map.get("mindMap", {}),
+        "resources": mind_map.get("resources", []),
+        "assessments": mind_map.get("assessments", {})
+    }
+    
+    if fallback is None:
+        await store_cached_course_content(topic, purpose, difficulty, PIPELINE_PROMPTS, parsed_content)
+    return parsed_content, True
+
+def build_fallback_content(topic: str, purpose: str, difficulty: str, topic_identifier: str):
+    """Enhanced fallback content with mind maps and notebook features"""
     return {
         "topic": topic,
         "summary": f"A comprehensive {difficulty} level course on {topic} designed for {purpose} preparation with interactive mind maps and structured learning aids.",
@@ -296,7 +822,7 @@ def generate_fallback_content(topic: str, purpose: str, difficulty: str):
                     "codeSnippets": [
                         {
                             "language": "javascript",
-                            "code": f"// Example {topic} implementation\nfunction example{topic.replace(' ', '')}() {{\n  return 'Working example';\n}}",
+                            "code": f"// Example {topic} implementation\nfunction example{topic_identifier}() {{\n  return 'Working example';\n}}",
                             "explanation": f"Basic {topic} implementation pattern"
                         }
                     ]
@@ -309,7 +835,7 @@ def generate_fallback_content(topic: str, purpose: str, difficulty: str):
                     "codeSnippets": [
                         {
                             "language": "javascript", 
-                            "code": f"// Advanced {topic} pattern\nclass Advanced{topic.replace(' ', '')} {{\n  constructor() {{\n    this.optimized = true;\n  }}\n}}",
+                            "code": f"// Advanced {topic} pattern\nclass Advanced{topic_identifier} {{\n  constructor() {{\n    this.optimized = true;\n  }}\n}}",
                             "explanation": f"Advanced {topic} implementation with optimization"
                         }
                     ]
@@ -580,8 +1106,16 @@ def generate_fallback_content(topic: str, purpose: str, difficulty: str):
         }
     }
 
+@functools.lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def generate_fallback_content(topic: str, purpose: str, difficulty: str):
+    """Generate enhanced fallback content with mind maps and notebook features when AI is not available
+
+    Memoised, so callers share the returned content and must not modify it.
+    """
+    return build_fallback_content(topic, purpose, difficulty, topic.replace(' ', ''))
+
 @app.post("/generate", response_model=CourseGenerationResponse)
-async def generate_course(request: CourseGenerationRequest, background_tasks: BackgroundTasks):
+async def generate_course(request: CourseGenerationRequest):
     """Generate a new course"""
     try:
         course_id = str(uuid.uuid4())
@@ -612,13 +1146,30 @@ async def generate_course(request: CourseGenerationRequest, background_tasks: Ba
         courses_collection = await get_courses_collection()
         await courses_collection.insert_one(course_data)
         
-        # Generate content in background
-        background_tasks.add_task(
-            generate_course_content_background,
-            course_id,
-            request.course_name,
-            request.purpose,
-            request.difficulty
+        # An equivalent course was generated recently: complete this one immediately
+        cached_content = await find_cached_course_content(
+            request.course_name, request.purpose.value, request.difficulty.value, configured_course_prompts()
+        )
+        if cached_content:
+            await store_generated_course(course_id, request.course_name, cached_content)
+            return CourseGenerationResponse(
+                course_id=course_id,
+                status="complete",
+                message="Course generated from cache",
+                estimated_completion_time=0
+            )
+        
+        # Queue content generation for the worker pool
+        job_queue = JobQueue(await get_jobs_collection())
+        await job_queue.enqueue(
+            COURSE_GENERATION_JOB,
+            {
+                "course_id": course_id,
+                "topic": request.course_name,
+                "purpose": request.purpose.value,
+                "difficulty": request.difficulty.value
+            },
+            job_id=course_id
         )
         
         return CourseGenerationResponse(
@@ -632,102 +1183,338 @@ async def generate_course(request: CourseGenerationRequest, background_tasks: Ba
         raise HTTPException(status_code=500, detail=f"Failed to start course generation: {str(e)}")
 
 async def generate_course_content_background(course_id: str, topic: str, purpose: str, difficulty: str):
-    """Background task to generate course content"""
-    try:
-        # Simulate some processing time
-        await asyncio.sleep(2)
-        
-        # Generate content using AI
+    """Generate course content and store it; raises so the job queue can retry"""
+    # Generate content using AI
+    if COURSE_GENERATION_MODE == "pipeline" and model:
+        generated_content, chapters_stored = await generate_course_content_pipeline(course_id, topic, purpose, difficulty)
+    elif COURSE_GENERATION_MODE == "stream" and model:
+        generated_content, chapters_stored = await stream_course_content_with_ai(course_id, topic, purpose, difficulty)
+    else:
         generated_content = await generate_course_content_with_ai(topic, purpose, difficulty)
-        
-        # Update course with generated content
-        courses_collection = await get_courses_collection()
-        chapters_collection = await get_chapters_collection()
-        
-        # Insert chapters
-        for chapter_data in generated_content.get("chapters", []):
-            chapter_doc = {
-                "_id": str(uuid.uuid4()),
-                "course_id": course_id,
-                "title": chapter_data["title"],
-                "content": chapter_data["content"],
-                "order_number": chapter_data["order_number"],
-                "json_content": {
-                    "duration_minutes": chapter_data.get("duration_minutes", 30),
-                    "learning_objectives": chapter_data.get("learning_objectives", []),
-                    "examples": chapter_data.get("examples", []),
-                    "key_points": chapter_data.get("key_points", [])
+        chapters_stored = False
+    await store_generated_course(course_id, topic, generated_content, chapters_stored)
+
+def build_chapter_doc(course_id: str, chapter_data: dict, order_number: int):
+    """Chapter document for the chapters collection"""
+    return {
+        "_id": str(uuid.uuid4()),
+        "course_id": course_id,
+        "title": chapter_data["title"],
+        "content": chapter_data["content"],
+        "order_number": chapter_data.get("order_number", order_number),
+        "json_content": {
+            "duration_minutes": chapter_data.get("duration_minutes", 30),
+            "learning_objectives": chapter_data.get("learning_objectives", []),
+            "examples": chapter_data.get("examples", []),
+            "key_points": chapter_data.get("key_points", [])
+        },
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+
+def build_assessment_docs(course_id: str, generated_content: dict):
+    """Flashcard, MCQ and Q&A documents for their collections"""
+    now = datetime.utcnow()
+    flashcards = [
+        {
+            "_id": str(uuid.uuid4()),
+            "course_id": course_id,
+            "question": card["question"],
+            "answer": card["answer"],
+            "difficulty": card.get("difficulty"),
+            "tags": [card["category"]] if card.get("category") else [],
+            "created_at": now
+        }
+        for card in generated_content.get("flashcards", [])
+    ]
+    mcqs = [
+        {
+            "_id": str(uuid.uuid4()),
+            "course_id": course_id,
+            "question": mcq["question"],
+            "options": mcq["options"],
+            "correct_answer": mcq["correct_answer"],
+            "explanation": mcq.get("explanation"),
+            "difficulty": mcq.get("difficulty"),
+            "tags": [],
+            "created_at": now
+        }
+        for mcq in generated_content.get("mcqs", [])
+    ]
+    qnas = [
+        {
+            "_id": str(uuid.uuid4()),
+            "course_id": course_id,
+            "question": qna["question"],
+            "answer": qna["answer"],
+            "difficulty": qna.get("difficulty"),
+            "tags": [],
+            "created_at": now
+        }
+        for qna in generated_content.get("qnas", [])
+    ]
+    return flashcards, mcqs, qnas
+
+async def replace_course_documents(collection, course_id: str, docs: list, session=None):
+    # Deleting first keeps a retried job from leaving duplicates behind
+    await collection.delete_many({"course_id": course_id}, session=session)
+    if docs:
+        await collection.insert_many(docs, ordered=False, session=session)
+
+async def store_course_sections(course_id: str, generated_content: dict, session=None):
+    """Upsert the sections that have no collection of their own"""
+    sections_collection = await get_course_sections_collection()
+    sections = {name: generated_content[name] for name in COURSE_DOCUMENT_SECTIONS if name in generated_content}
+    await sections_collection.replace_one(
+        {"_id": course_id},
+        {"course_id": course_id, "topic": generated_content.get("topic"), **sections, "updated_at": datetime.utcnow()},
+        upsert=True,
+        session=session
+    )
+
+def count_course_sections(generated_content: dict) -> dict:
+    return {name: len(generated_content.get(name, [])) for name in COURSE_COLLECTION_SECTIONS}
+
+async def write_generated_course(course_id: str, topic: str, generated_content: dict, chapters_stored: bool, session=None):
+    """Bulk-write a course's sections, chapters and assessments, then mark it complete"""
+    courses_collection = await get_courses_collection()
+    flashcards, mcqs, qnas = build_assessment_docs(course_id, generated_content)
+    writes = [
+        (await get_flashcards_collection(), flashcards),
+        (await get_mcqs_collection(), mcqs),
+        (await get_qnas_collection(), qnas)
+    ]
+    if not chapters_stored:
+        chapters = [
+            build_chapter_doc(course_id, chapter_data, order_number)
+            for order_number, chapter_data in enumerate(generated_content.get("chapters", []), start=1)
+        ]
+        writes.append((await get_chapters_collection(), chapters))
+    
+    if session is None:
+        await asyncio.gather(
+            store_course_sections(course_id, generated_content),
+            *(replace_course_documents(collection, course_id, docs) for collection, docs in writes)
+        )
+    else:
+        # Operations in a transaction must not run concurrently on its session
+        await store_course_sections(course_id, generated_content, session=session)
+        for collection, docs in writes:
+            await replace_course_documents(collection, course_id, docs, session=session)
+    
+    # The status only flips once every artifact is in place; the course document keeps metadata only
+    await courses_collection.update_one(
+        {"_id": course_id},
+        {
+            "$set": {
+                "content": {
+                    "status": "complete",
+                    "message": "Course generated successfully",
+                    "last_updated": datetime.utcnow(),
+                    "counts": count_course_sections(generated_content)
                 },
-                "created_at": datetime.utcnow(),
+                "summary": generated_content.get("summary", f"Course on {topic}"),
                 "updated_at": datetime.utcnow()
             }
-            await chapters_collection.insert_one(chapter_doc)
-        
-        # Update course status
-        await courses_collection.update_one(
-            {"_id": course_id},
-            {
-                "$set": {
-                    "content": {
-                        "status": "complete",
-                        "message": "Course generated successfully",
-                        "last_updated": datetime.utcnow(),
-                        "parsed_content": generated_content
-                    },
-                    "summary": generated_content.get("summary", f"Course on {topic}"),
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        print(f"Course {course_id} generated successfully")
-        
-    except Exception as e:
-        # Update course with error status
-        courses_collection = await get_courses_collection()
-        await courses_collection.update_one(
-            {"_id": course_id},
-            {
-                "$set": {
-                    "content": {
-                        "status": "error",
-                        "message": f"Failed to generate course: {str(e)}",
-                        "last_updated": datetime.utcnow()
-                    },
-                    "updated_at": datetime.utcnow()
-                }
+        },
+        session=session
+    )
+
+async def load_course_sections(course_id: str, names: list) -> dict:
+    """Load the named sections of a course from wherever they are stored"""
+    sections = {}
+    document_sections = [name for name in names if name in COURSE_DOCUMENT_SECTIONS]
+    if document_sections:
+        sections_collection = await get_course_sections_collection()
+        stored = await sections_collection.find_one({"_id": course_id}, {name: 1 for name in document_sections}) or {}
+        for name in document_sections:
+            sections[name] = stored.get(name)
+    
+    for name in names:
+        if name in COURSE_COLLECTION_SECTIONS:
+            collection = await COURSE_COLLECTION_SECTIONS[name]()
+            cursor = collection.find({"course_id": course_id})
+            if name == "chapters":
+                cursor = cursor.sort("order_number", 1)
+            sections[name] = await cursor.to_list(length=None)
+    return sections
+
+def parse_section_names(sections: Optional[str]) -> list:
+    if not sections:
+        return []
+    names = [name.strip() for name in sections.split(",") if name.strip()]
+    unknown = [name for name in names if name not in COURSE_DOCUMENT_SECTIONS and name not in COURSE_COLLECTION_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown course sections: {', '.join(unknown)}")
+    return names
+
+async def store_generated_course(course_id: str, topic: str, generated_content: dict, chapters_stored: bool = False):
+    """Store a course's chapters, unless streaming already did, and its assessments, and mark it complete"""
+    if MONGODB_TRANSACTIONS:
+        async with await db_manager.start_session() as session:
+            await session.with_transaction(
+                lambda session: write_generated_course(course_id, topic, generated_content, chapters_stored, session=session)
+            )
+    else:
+        await write_generated_course(course_id, topic, generated_content, chapters_stored)
+    
+    await notify_course_status(course_id, "complete", message="Course generated successfully")
+    print(f"Course {course_id} generated successfully")
+
+async def run_course_generation_job(payload: dict):
+    """Job queue handler for COURSE_GENERATION_JOB"""
+    await generate_course_content_background(
+        payload["course_id"],
+        payload["topic"],
+        payload["purpose"],
+        payload["difficulty"]
+    )
+
+async def mark_course_failed(job: dict, error: str):
+    """Record a course whose generation job has exhausted its retries"""
+    course_id = job["payload"]["course_id"]
+    message = f"Failed to generate course: {error}"
+    courses_collection = await get_courses_collection()
+    await courses_collection.update_one(
+        {"_id": course_id},
+        {
+            "$set": {
+                "content": {
+                    "status": "error",
+                    "message": message,
+                    "last_updated": datetime.utcnow()
+                },
+                "updated_at": datetime.utcnow()
             }
-        )
-        print(f"Error generating course {course_id}: {e}")
+        }
+    )
+    await notify_course_status(course_id, "error", message=message)
+    print(f"Error generating course {course_id}: {error}")
 
 @app.get("/courses")
-async def get_user_courses(user_id: str):
-    """Get all courses for a user"""
+async def get_user_courses(user_id: str, fields: Optional[str] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get a page of a user's courses, newest first"""
+    try:
+        projection = build_projection(fields)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         courses_collection = await get_courses_collection()
-        cursor = courses_collection.find({"user_id": user_id}).sort("created_at", -1)
-        courses = await cursor.to_list(length=100)
+        page = await paginate(courses_collection, {"user_id": user_id}, projection, cursor, limit)
         
-        return APIResponse(
+        return DocumentResponse(APIResponse(
             success=True,
-            data=serialize_doc(courses)
-        )
+            data=page
+        ))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch courses: {str(e)}")
 
+async def iter_user_courses(user_id: str):
+    """Every course of a user, newest first, fetched a page at a time"""
+    courses_collection = await get_courses_collection()
+    cursor = None
+    while True:
+        # Short keyset queries rather than one cursor that a slow download could let time out
+        page = await paginate(courses_collection, {"user_id": user_id}, None, cursor, EXPORT_BATCH_SIZE)
+        for course in page.items:
+            yield course
+        if not page.has_next:
+            return
+        cursor = page.next_cursor
+
+async def iter_course_records(course: dict):
+    """(collection, document) for everything stored for a course, streamed from MongoDB"""
+    course_id = course["_id"]
+    yield "courses", course
+    
+    sections_collection = await get_course_sections_collection()
+    sections = await sections_collection.find_one({"_id": course_id})
+    if sections:
+        yield "course_sections", sections
+    
+    for name, get_collection in COURSE_COLLECTION_SECTIONS.items():
+        collection = await get_collection()
+        cursor = collection.find({"course_id": course_id}).batch_size(EXPORT_BATCH_SIZE)
+        if name == "chapters":
+            cursor = cursor.sort("order_number", 1)
+        async for doc in cursor:
+            yield name, doc
+
+async def export_ndjson(courses):
+    """One JSON line per document: {"collection": ..., "document": ...}"""
+    async for course in courses:
+        async for collection, doc in iter_course_records(course):
+            yield dumps({"collection": collection, "document": doc}) + b"\n"
+
+async def export_zip(courses):
+    """A folder per course holding course.json, sections.json and an NDJSON file per collection"""
+    archive = ZipStream()
+    async for course in courses:
+        current, entry = None, None
+        async for collection, doc in iter_course_records(course):
+            if collection != current:
+                if entry:
+                    entry.close()
+                current = collection
+                entry = archive.open(f"{course['_id']}/{EXPORT_ZIP_FILES.get(collection, f'{collection}.ndjson')}")
+            entry.write(dumps(doc) + b"\n")
+            data = archive.drain()
+            if data:
+                yield data
+        if entry:
+            entry.close()
+    yield archive.close()
+
+def export_response(courses, format: str, filename: str) -> StreamingResponse:
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown export format: {format}")
+    body = export_zip(courses) if format == "zip" else export_ndjson(courses)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+@app.get("/courses/export")
+async def export_user_courses(user_id: str, format: str = "ndjson"):
+    """Stream every course of a user with all of its content, as NDJSON or a zip archive"""
+    return export_response(iter_user_courses(user_id), format, "courses")
+
+@app.get("/courses/{course_id}/export")
+async def export_course(course_id: str, user_id: str, format: str = "ndjson"):
+    """Stream a course of the user with all of its content, as NDJSON or a zip archive"""
+    courses_collection = await get_courses_collection()
+    # Another user's course is reported as missing rather than forbidden
+    course = await courses_collection.find_one({"_id": course_id, "user_id": user_id})
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    async def courses():
+        yield course
+    
+    return export_response(courses(), format, f"course-{course_id}")
+
 @app.get("/courses/{course_id}")
-async def get_course(course_id: str):
+async def get_course(course_id: str, fields: Optional[str] = None):
     """Get a specific course"""
+    try:
+        projection = build_projection(fields)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         courses_collection = await get_courses_collection()
-        course = await courses_collection.find_one({"_id": course_id})
+        course = await courses_collection.find_one({"_id": course_id}, projection)
         
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        return APIResponse(
-            success=True,
-            data=serialize_doc(course)
+        return DocumentResponse(
+            APIResponse(success=True, data=course),
+            headers={"X-Course-Status": course.get("content", {}).get("status") or ""}
         )
     except HTTPException:
         raise
@@ -735,8 +1522,9 @@ async def get_course(course_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch course: {str(e)}")
 
 @app.get("/courses/{course_id}/content")
-async def get_course_content(course_id: str):
-    """Get course content including chapters"""
+async def get_course_content(course_id: str, sections: Optional[str] = None):
+    """Get course content including chapters, plus any other sections asked for"""
+    section_names = parse_section_names(sections)
     try:
         courses_collection = await get_courses_collection()
         chapters_collection = await get_chapters_collection()
@@ -747,23 +1535,110 @@ async def get_course_content(course_id: str):
         
         # Get chapters
         cursor = chapters_collection.find({"course_id": course_id}).sort("order_number", 1)
-        chapters = await cursor.to_list(length=100)
-        
-        response_data = serialize_doc(course)
-        response_data["chapters"] = serialize_doc(chapters)
+        course["chapters"] = await cursor.to_list(length=100)
+        if section_names:
+            course["sections"] = await load_course_sections(course_id, [name for name in section_names if name != "chapters"])
         
-        return APIResponse(
-            success=True,
-            data=response_data
+        return DocumentResponse(
+            APIResponse(success=True, data=course),
+            headers={"X-Course-Status": course.get("content", {}).get("status") or ""}
         )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch course content: {str(e)}")
 
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@app.get("/courses/{course_id}/events")
+async def course_events(course_id: str, request: Request):
+    """Server-sent events reporting per-chapter progress and status changes of a course"""
+    courses_collection = await get_courses_collection()
+    chapters_collection = await get_chapters_collection()
+    
+    if not await courses_collection.find_one({"_id": course_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    async def event_stream():
+        # Subscribe before reading the current state so nothing published in between is missed
+        with course_event_hub.subscribe(course_id) as events:
+            course = await courses_collection.find_one(
+                {"_id": course_id}, {"content.status": 1, "content.message": 1}
+            )
+            if not course:
+                yield format_sse("error", {"course_id": course_id, "message": "Course not found"})
+                return
+            
+            sent_chapters = set()
+            cursor = chapters_collection.find(
+                {"course_id": course_id}, {"course_id": 1, "title": 1, "order_number": 1}
+            ).sort("order_number", 1)
+            async for chapter in cursor:
+                sent_chapters.add(chapter["order_number"])
+                yield format_sse("chapter", {**chapter_event(chapter)["data"], "chapters_ready": len(sent_chapters)})
+            
+            content = course.get("content", {})
+            last_status = content.get("status")
+            yield format_sse("status", status_event(course_id, last_status, content.get("message"))["data"])
+            
+            while last_status not in ("complete", "error"):
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=COURSE_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Events can be lost (watcher restart, publish on another replica),
+                    # so re-read the status rather than waiting on the hub forever
+                    course = await courses_collection.find_one(
+                        {"_id": course_id}, {"content.status": 1, "content.message": 1}
+                    )
+                    content = (course or {}).get("content", {})
+                    status = content.get("status") if course else "error"
+                    if status != last_status:
+                        last_status = status
+                        yield format_sse("status", status_event(course_id, status, content.get("message"))["data"])
+                    else:
+                        yield ": keep-alive\n\n"
+                    continue
+                
+                data = event["data"]
+                if event["event"] == "chapter":
+                    if data["order_number"] in sent_chapters:
+                        continue
+                    sent_chapters.add(data["order_number"])
+                    data = {**data, "chapters_ready": len(sent_chapters)}
+                elif data["status"] == last_status:
+                    continue
+                else:
+                    last_status = data["status"]
+                yield format_sse(event["event"], data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/internal/courses/{course_id}/events")
+async def publish_course_event(course_id: str, event: dict, _: None = Depends(verify_internal_token)):
+    """Publish an event from a worker process to this process's /events subscribers"""
+    if event.get("event") not in ("chapter", "status") or not isinstance(event.get("data"), dict):
+        raise HTTPException(status_code=400, detail="Invalid event")
+    
+    # With change streams open the same change reaches subscribers from MongoDB
+    subscribers = 0
+    if course_events_mode == "pubsub":
+        subscribers = course_event_hub.publish(course_id, event)
+    return {"published": course_events_mode == "pubsub", "subscribers": subscribers}
+
+@app.get("/events/stats")
+async def get_event_stats():
+    return {"mode": course_events_mode, **course_event_hub.get_stats()}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "agent": "course-generation"}
+    return {"status": "healthy", "agent": "course-generation", "llm": get_llm_stats()}
 
 if __name__ == "__main__":
     import uvicorn
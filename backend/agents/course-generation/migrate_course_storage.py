@@ -0,0 +1,74 @@
+"""Move content.parsed_content out of existing course documents
+
+    python migrate_course_storage.py [--dry-run] [--batch-size N]
+
+Safe to re-run: only courses that still embed parsed_content are touched.
+"""
+import argparse
+import asyncio
+
+from main import (
+    build_assessment_docs, count_course_sections,
+    replace_course_documents, store_course_sections
+)
+from shared.database.connection import (
+    init_database, close_database, get_courses_collection, get_chapters_collection,
+    get_flashcards_collection, get_mcqs_collection, get_qnas_collection
+)
+
+
+async def migrate_course(course: dict):
+    course_id = course["_id"]
+    parsed_content = course["content"]["parsed_content"] or {}
+    
+    await store_course_sections(course_id, parsed_content)
+    
+    # Chapters were always written to their collection; assessments only since bulk persistence
+    flashcards, mcqs, qnas = build_assessment_docs(course_id, parsed_content)
+    for collection, docs in (
+        (await get_flashcards_collection(), flashcards),
+        (await get_mcqs_collection(), mcqs),
+        (await get_qnas_collection(), qnas)
+    ):
+        if not await collection.count_documents({"course_id": course_id}, limit=1):
+            await replace_course_documents(collection, course_id, docs)
+    
+    counts = count_course_sections(parsed_content)
+    counts["chapters"] = await (await get_chapters_collection()).count_documents({"course_id": course_id})
+    
+    courses_collection = await get_courses_collection()
+    await courses_collection.update_one(
+        {"_id": course_id},
+        {"$set": {"content.counts": counts}, "$unset": {"content.parsed_content": ""}}
+    )
+
+
+async def migrate(dry_run: bool, batch_size: int):
+    await init_database()
+    try:
+        courses_collection = await get_courses_collection()
+        query = {"content.parsed_content": {"$exists": True}}
+        total = await courses_collection.count_documents(query)
+        print(f"{total} course(s) embed parsed_content")
+        if dry_run:
+            return
+        
+        migrated = 0
+        cursor = courses_collection.find(query, {"content": 1}).batch_size(batch_size)
+        async for course in cursor:
+            try:
+                await migrate_course(course)
+                migrated += 1
+            except Exception as e:
+                print(f"Failed to migrate course {course['_id']}: {e}")
+        print(f"Migrated {migrated} of {total} course(s)")
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only count the courses to migrate")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run, args.batch_size))
@@ -0,0 +1,54 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from main import COURSE_GENERATION_JOB, run_course_generation_job, mark_course_failed
+from shared.database.connection import init_database, close_database, get_jobs_collection
+from shared.jobs.queue import JobQueue
+from shared.jobs.worker import JobWorker
+from shared.utils.http_client import close_http_client
+
+# Worker processes per container; each runs JOB_WORKER_CONCURRENCY jobs at a time
+JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "2"))
+
+
+async def run_worker():
+    """Drain course generation jobs until SIGTERM/SIGINT"""
+    await init_database()
+    worker = JobWorker(
+        JobQueue(await get_jobs_collection()),
+        {COURSE_GENERATION_JOB: run_course_generation_job},
+        on_failure=mark_course_failed,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await close_http_client()
+        await close_database()
+
+
+def worker_process():
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    if JOB_WORKER_PROCESSES <= 1:
+        worker_process()
+    else:
+        processes = [multiprocessing.Process(target=worker_process) for _ in range(JOB_WORKER_PROCESSES)]
+        for process in processes:
+            process.start()
+        
+        # Docker only signals PID 1, so pass shutdown on to the workers
+        def forward_signal(signum, frame):
+            for process in processes:
+                process.terminate()
+        
+        signal.signal(signal.SIGTERM, forward_signal)
+        signal.signal(signal.SIGINT, forward_signal)
+        for process in processes:
+            process.join()
@@ -7,15 +7,19 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.database.connection import init_database, close_database, get_mock_interviews_collection, get_interview_questions_collection, get_interview_analysis_collection
-from shared.models.schemas import MockInterview, InterviewQuestion, InterviewAnalysis, InterviewStartRequest, InterviewStartResponse, APIResponse, FacialData, Recommendation
-import google.generativeai as genai
-import json
+from shared.database.projection import build_projection, InvalidFieldsError
+from shared.database.pagination import paginate, InvalidCursorError, DEFAULT_PAGE_SIZE
+from shared.llm.gemini import get_model, get_llm_stats, generate_content_async, INTERACTIVE
+from shared.llm.json_output import parse_llm_json
+from shared.utils.serialization import DocumentResponse
+from shared.models.schemas import MockInterview, InterviewQuestion, InterviewAnalysis, InterviewStartRequest, InterviewStartResponse, APIResponse, FacialData, Recommendation, GeneratedInterviewQuestion
 from datetime import datetime
-from bson import ObjectId
+from typing import List, Optional
+import functools
 import uuid
 import random
 
-app = FastAPI(title="Interview Coach Agent", version="1.0.0")
+app = FastAPI(title="Interview Coach Agent", version="1.0.0", default_response_class=DocumentResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +29,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Gemini
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client; None when no model is configured
+model = get_model()
+
+# Distinct (job_role, tech_stack) fallback question pools kept in memory
+FALLBACK_CACHE_SIZE = int(os.getenv("FALLBACK_CACHE_SIZE", "256"))
 
 @app.on_event("startup")
 async def startup_event():
@@ -39,30 +43,6 @@ async def startup_event():
 async def shutdown_event():
     await close_database()
 
-def serialize_doc(doc):
-    """Convert MongoDB document to JSON serializable format"""
-    if doc is None:
-        return None
-    if isinstance(doc, list):
-        return [serialize_doc(d) for d in doc]
-    if isinstance(doc, dict):
-        result = {}
-        for key, value in doc.items():
-            if key == "_id":
-                result["id"] = str(value)
-            elif isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, datetime):
-                result[key] = value.isoformat()
-            elif isinstance(value, dict):
-                result[key] = serialize_doc(value)
-            elif isinstance(value, list):
-                result[key] = serialize_doc(value)
-            else:
-                result[key] = value
-        return result
-    return doc
-
 async def generate_interview_questions(job_role: str, tech_stack: str, experience: str, question_count: int = 5):
     """Generate interview questions using AI"""
     
@@ -89,26 +69,19 @@ async def generate_interview_questions(job_role: str, tech_stack: str, experienc
     """
     
     try:
-        if GEMINI_API_KEY and model:
-            response = model.generate_content(prompt)
-            content_text = response.text.strip()
-            
-            # Clean up the response to extract JSON
-            if content_text.startswith("```json"):
-                content_text = content_text[7:]
-            if content_text.endswith("```"):
-                content_text = content_text[:-3]
-            
-            questions = json.loads(content_text)
-            return questions
+        if model:
+            # Asked for by /start while the candidate waits, so ahead of background course builds
+            response = await generate_content_async(model, prompt, priority=INTERACTIVE)
+            return parse_llm_json(response.text, List[GeneratedInterviewQuestion])
         else:
             return generate_fallback_questions(job_role, tech_stack, experience, question_count)
     except Exception as e:
         print(f"Error generating questions with AI: {e}")
         return generate_fallback_questions(job_role, tech_stack, experience, question_count)
 
-def generate_fallback_questions(job_role: str, tech_stack: str, experience: str, question_count: int):
-    """Generate fallback questions when AI is not available"""
+@functools.lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def build_fallback_question_pool(job_role: str, tech_stack: str):
+    """Every fallback question with its metadata; memoised, so the questions must not be modified"""
     
     technical_questions = [
         f"Explain the key concepts of {tech_stack} that are essential for a {job_role}.",
@@ -134,23 +107,26 @@ def generate_fallback_questions(job_role: str, tech_stack: str, experience: str,
         "How do you ensure code quality in your projects?"
     ]
     
-    all_questions = technical_questions + behavioral_questions + problem_solving_questions
-    selected_questions = random.sample(all_questions, min(question_count, len(all_questions)))
-    
-    questions = []
-    for i, q in enumerate(selected_questions):
-        question_type = "technical" if i < len(technical_questions) and q in technical_questions else \
-                       "behavioral" if q in behavioral_questions else "problem_solving"
-        
-        questions.append({
+    return [
+        {
             "question": q,
             "type": question_type,
             "difficulty": "medium",
             "expected_answer": f"A good answer should demonstrate understanding of {tech_stack} and {job_role} responsibilities.",
             "evaluation_criteria": ["Technical accuracy", "Communication clarity", "Problem-solving approach"]
-        })
-    
-    return questions
+        }
+        for question_type, questions in (
+            ("technical", technical_questions),
+            ("behavioral", behavioral_questions),
+            ("problem_solving", problem_solving_questions)
+        )
+        for q in questions
+    ]
+
+def generate_fallback_questions(job_role: str, tech_stack: str, experience: str, question_count: int):
+    """Generate fallback questions when AI is not available"""
+    all_questions = build_fallback_question_pool(job_role, tech_stack)
+    return random.sample(all_questions, min(question_count, len(all_questions)))
 
 @app.post("/start", response_model=InterviewStartResponse)
 async def start_interview(request: InterviewStartRequest):
@@ -208,7 +184,7 @@ async def start_interview(request: InterviewStartRequest):
             
             await questions_collection.insert_one(question_doc)
             question_ids.append(question_id)
-            interview_questions.append(InterviewQuestion(**serialize_doc(question_doc)))
+            interview_questions.append(InterviewQuestion(**question_doc))
         
         # Update interview with question IDs
         await interviews_collection.update_one(
@@ -226,17 +202,23 @@ async def start_interview(request: InterviewStartRequest):
         raise HTTPException(status_code=500, detail=f"Failed to start interview: {str(e)}")
 
 @app.get("/interviews")
-async def get_user_interviews(user_id: str):
-    """Get all interviews for a user"""
+async def get_user_interviews(user_id: str, fields: Optional[str] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get a page of a user's interviews, newest first"""
+    try:
+        projection = build_projection(fields)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         interviews_collection = await get_mock_interviews_collection()
-        cursor = interviews_collection.find({"user_id": user_id}).sort("created_at", -1)
-        interviews = await cursor.to_list(length=100)
+        page = await paginate(interviews_collection, {"user_id": user_id}, projection, cursor, limit)
         
-        return APIResponse(
+        return DocumentResponse(APIResponse(
             success=True,
-            data=serialize_doc(interviews)
-        )
+            data=page
+        ))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch interviews: {str(e)}")
 
@@ -255,13 +237,12 @@ async def get_interview(interview_id: str):
         cursor = questions_collection.find({"interview_id": interview_id}).sort("order_number", 1)
         questions = await cursor.to_list(length=100)
         
-        response_data = serialize_doc(interview)
-        response_data["questions"] = serialize_doc(questions)
+        interview["questions"] = questions
         
-        return APIResponse(
+        return DocumentResponse(APIResponse(
             success=True,
-            data=response_data
-        )
+            data=interview
+        ))
     except HTTPException:
         raise
     except Exception as e:
@@ -337,17 +318,17 @@ async def analyze_interview(interview_id: str, analysis_data: dict):
             }
         )
         
-        return APIResponse(
+        return DocumentResponse(APIResponse(
             success=True,
-            data=serialize_doc(analysis_doc)
-        )
+            data=analysis_doc
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze interview: {str(e)}")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "agent": "interview-coach"}
+    return {"status": "healthy", "agent": "interview-coach", "llm": get_llm_stats()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,162 @@
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+
+# Defaults applied to every agent unless overridden per agent, e.g.
+# COURSE_GENERATION_MAX_CONNECTIONS=50 or INTERVIEW_COACH_READ_TIMEOUT=60
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("AGENT_POOL_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE = int(os.getenv("AGENT_POOL_MAX_KEEPALIVE", "20"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("AGENT_POOL_KEEPALIVE_EXPIRY", "30"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("AGENT_POOL_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("AGENT_POOL_READ_TIMEOUT", "30"))
+DEFAULT_POOL_TIMEOUT = float(os.getenv("AGENT_POOL_POOL_TIMEOUT", "5"))
+
+
+def agent_env(agent_name: str, setting: str, default):
+    """Read a per-agent setting, e.g. agent_env("course-generation", "MAX_CONNECTIONS", 100)"""
+    prefix = agent_name.upper().replace("-", "_")
+    return os.getenv(f"{prefix}_{setting}", default)
+
+
+@dataclass
+class AgentPoolConfig:
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_keepalive: int = DEFAULT_MAX_KEEPALIVE
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    pool_timeout: float = DEFAULT_POOL_TIMEOUT
+
+    @classmethod
+    def from_env(cls, agent_name: str) -> "AgentPoolConfig":
+        """Build the pool config for an agent from its prefixed environment variables"""
+        return cls(
+            max_connections=int(agent_env(agent_name, "MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive=int(agent_env(agent_name, "MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=float(agent_env(agent_name, "KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)),
+            connect_timeout=float(agent_env(agent_name, "CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(agent_env(agent_name, "READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            pool_timeout=float(agent_env(agent_name, "POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+        )
+
+
+class _PoolStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+
+class AgentClientPool:
+    """Owns one long-lived, pooled HTTP client per agent service
+
+    The client is shared by all of an agent's replicas; httpx keeps a separate
+    set of keep-alive connections per origin inside the one pool.
+    """
+
+    def __init__(self, services: Dict[str, List[str]]):
+        self.services = services
+        self.configs: Dict[str, AgentPoolConfig] = {
+            name: AgentPoolConfig.from_env(name) for name in services
+        }
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats: Dict[str, _PoolStats] = {name: _PoolStats() for name in services}
+
+    def _build_client(self, agent_name: str) -> httpx.AsyncClient:
+        config = self.configs[agent_name]
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                config.read_timeout,
+                connect=config.connect_timeout,
+                pool=config.pool_timeout,
+            ),
+        )
+
+    async def start(self):
+        """Create the pooled clients; called once on application startup"""
+        for agent_name in self.services:
+            if agent_name not in self.clients:
+                self.clients[agent_name] = self._build_client(agent_name)
+
+    async def close(self):
+        """Close every pooled client and release its connections"""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+
+    def get_client(self, agent_name: str) -> httpx.AsyncClient:
+        """Return the pooled client for an agent, creating it lazily if needed"""
+        client = self.clients.get(agent_name)
+        if client is None:
+            client = self._build_client(agent_name)
+            self.clients[agent_name] = client
+        return client
+
+    def begin(self, agent_name: str) -> float:
+        """Mark a request to the agent as in flight and return its start time"""
+        stats = self.stats[agent_name]
+        stats.in_flight += 1
+        stats.requests += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        return time.perf_counter()
+
+    def end(self, agent_name: str, started: float, failed: bool = False):
+        """Mark a request started with begin() as finished"""
+        stats = self.stats[agent_name]
+        stats.in_flight -= 1
+        stats.total_latency += time.perf_counter() - started
+        if failed:
+            stats.errors += 1
+
+    @asynccontextmanager
+    async def track(self, agent_name: str):
+        """Record an in-flight request against the agent's pool statistics"""
+        started = self.begin(agent_name)
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.end(agent_name, started, failed)
+
+    def _connection_counts(self, agent_name: str) -> Optional[Dict[str, int]]:
+        # httpx does not expose its connection pool publicly, so read it defensively
+        client = self.clients.get(agent_name)
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return None
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Report pool configuration and utilisation for every agent"""
+        report = {}
+        for agent_name, config in self.configs.items():
+            stats = self.stats[agent_name]
+            report[agent_name] = {
+                "max_connections": config.max_connections,
+                "max_keepalive": config.max_keepalive,
+                "keepalive_expiry": config.keepalive_expiry,
+                "in_flight": stats.in_flight,
+                "peak_in_flight": stats.peak_in_flight,
+                "utilisation": round(stats.in_flight / config.max_connections, 4),
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "avg_latency_ms": round(stats.total_latency / stats.requests * 1000, 2) if stats.requests else 0.0,
+                "connections": self._connection_counts(agent_name),
+            }
+        return report
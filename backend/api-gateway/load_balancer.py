@@ -0,0 +1,98 @@
+import os
+import random
+import time
+from typing import Dict, List
+
+# "p2c" (power of two choices) or "least_outstanding"
+LOAD_BALANCER_POLICY = os.getenv("LOAD_BALANCER_POLICY", "p2c")
+# Passive health checking: consecutive failures before a replica is ejected, and for how long
+REPLICA_FAILURE_THRESHOLD = int(os.getenv("REPLICA_FAILURE_THRESHOLD", "3"))
+REPLICA_EJECTION_SECONDS = float(os.getenv("REPLICA_EJECTION_SECONDS", "30"))
+
+
+def parse_replicas(value: str) -> List[str]:
+    """Split a comma-separated list of replica base URLs"""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class ReplicaSet:
+    """Replicas of one agent, picked by outstanding requests and ejected on repeated failures"""
+
+    def __init__(self, agent_name: str, urls: List[str]):
+        self.agent_name = agent_name
+        self.replicas = [Replica(url) for url in urls]
+
+    def choose(self) -> Replica:
+        """Pick a replica for the next request and count it as outstanding"""
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.is_healthy(now)]
+        # If every replica is ejected, spreading load over all of them beats failing outright
+        if not candidates:
+            candidates = self.replicas
+
+        if len(candidates) == 1:
+            replica = candidates[0]
+        elif LOAD_BALANCER_POLICY == "least_outstanding":
+            replica = min(candidates, key=lambda candidate: candidate.outstanding)
+        else:
+            first, second = random.sample(candidates, 2)
+            replica = first if first.outstanding <= second.outstanding else second
+
+        replica.outstanding += 1
+        replica.requests += 1
+        return replica
+
+    def release(self, replica: Replica, success: bool):
+        """Finish a request and update the replica's passive health state"""
+        replica.outstanding -= 1
+        if success:
+            replica.consecutive_failures = 0
+            return
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= REPLICA_FAILURE_THRESHOLD:
+            replica.ejected_until = time.monotonic() + REPLICA_EJECTION_SECONDS
+            replica.consecutive_failures = 0
+            replica.ejections += 1
+            print(f"Ejected {self.agent_name} replica {replica.url} for {REPLICA_EJECTION_SECONDS}s")
+
+    def get_stats(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.url,
+                "healthy": replica.is_healthy(now),
+                "outstanding": replica.outstanding,
+                "requests": replica.requests,
+                "failures": replica.failures,
+                "ejections": replica.ejections,
+            }
+            for replica in self.replicas
+        ]
+
+
+class LoadBalancer:
+    """One ReplicaSet per agent service"""
+
+    def __init__(self, services: Dict[str, List[str]]):
+        self.replica_sets = {name: ReplicaSet(name, urls) for name, urls in services.items()}
+
+    def __getitem__(self, agent_name: str) -> ReplicaSet:
+        return self.replica_sets[agent_name]
+
+    def get_stats(self) -> Dict[str, List[dict]]:
+        return {name: replica_set.get_stats() for name, replica_set in self.replica_sets.items()}
@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.background import BackgroundTask
 import httpx
 import os
+import asyncio
+import math
 from typing import Optional
+from urllib.parse import urlencode
 import jwt
 from datetime import datetime, timedelta
+from agent_pool import AgentClientPool
+from token_cache import VerifiedTokenCache, RevokedTokenSet
+from response_cache import ResponseCache, etag_matches
+from singleflight import SingleFlight
+from resilience import AgentGuards, AgentUnavailableError
+from load_balancer import LoadBalancer, parse_replicas
+from rate_limit import TokenBucketLimiter, ROUTE_COSTS
 
 app = FastAPI(title="StudyMate API Gateway", version="1.0.0")
 
@@ -21,20 +33,67 @@ app.add_middleware(
 # Security
 security = HTTPBearer()
 
-# Agent service URLs
+# Agent service URLs; each may list several comma-separated replicas
 AGENT_SERVICES = {
-    "course-generation": os.getenv("COURSE_GENERATION_URL", "http://course-generation:8001"),
-    "interview-coach": os.getenv("INTERVIEW_COACH_URL", "http://interview-coach:8002"),
-    "chat-mentor": os.getenv("CHAT_MENTOR_URL", "http://chat-mentor:8003"),
-    "progress-analyst": os.getenv("PROGRESS_ANALYST_URL", "http://progress-analyst:8004"),
-    "resume-analyzer": os.getenv("RESUME_ANALYZER_URL", "http://resume-analyzer:8005"),
-    "exam-prep": os.getenv("EXAM_PREP_URL", "http://exam-prep:8006"),
+    "course-generation": parse_replicas(os.getenv("COURSE_GENERATION_URL", "http://course-generation:8001")),
+    "interview-coach": parse_replicas(os.getenv("INTERVIEW_COACH_URL", "http://interview-coach:8002")),
+    "chat-mentor": parse_replicas(os.getenv("CHAT_MENTOR_URL", "http://chat-mentor:8003")),
+    "progress-analyst": parse_replicas(os.getenv("PROGRESS_ANALYST_URL", "http://progress-analyst:8004")),
+    "resume-analyzer": parse_replicas(os.getenv("RESUME_ANALYZER_URL", "http://resume-analyzer:8005")),
+    "exam-prep": parse_replicas(os.getenv("EXAM_PREP_URL", "http://exam-prep:8006")),
 }
 
+# Replica selection and passive health checks per agent
+load_balancer = LoadBalancer(AGENT_SERVICES)
+
+# Pooled, long-lived HTTP clients for agent forwarding
+agent_pool = AgentClientPool(AGENT_SERVICES)
+
+# Per-agent circuit breakers, bulkheads and adaptive timeouts
+agent_guards = AgentGuards(AGENT_SERVICES)
+
+@app.on_event("startup")
+async def startup_event():
+    await agent_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await agent_pool.close()
+
+# Per-section deadline for the aggregate dashboard endpoint
+DASHBOARD_SECTION_TIMEOUT = float(os.getenv("DASHBOARD_SECTION_TIMEOUT", "2"))
+# The dashboard only lists courses, so it never needs their generated content
+DASHBOARD_COURSE_FIELDS = "id,title,purpose,difficulty,summary,content.status,progress,created_at"
+# Most recent courses and interviews shown on the dashboard; older ones are paged in via cursor=
+DASHBOARD_LIST_LIMIT = int(os.getenv("DASHBOARD_LIST_LIMIT", "10"))
+
+# Course event streams send a keep-alive every 15s, so a longer silence means the agent is gone
+COURSE_EVENTS_READ_TIMEOUT = float(os.getenv("COURSE_EVENTS_READ_TIMEOUT", "45"))
+
+# Exports stream for as long as the data lasts; this only bounds the wait for the next chunk
+EXPORT_READ_TIMEOUT = float(os.getenv("EXPORT_READ_TIMEOUT", "60"))
+
+# Shared secret agents present when calling the gateway's internal endpoints
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+# Cached course reads, invalidated by course status notifications from the agent
+response_cache = ResponseCache()
+
+# Collapses identical concurrent upstream GETs into a single agent request
+upstream_flights = SingleFlight()
+
 # JWT Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 
+# Per-user admission control for authenticated routes
+rate_limiter = TokenBucketLimiter()
+
+# Verified tokens, so repeat requests skip jwt.decode until the token expires
+token_cache = VerifiedTokenCache()
+# Signed-out tokens, rejected until they expire even though their signature is still valid
+revoked_tokens = RevokedTokenSet()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -46,37 +105,226 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    if revoked_tokens.is_revoked(token):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
+        token_cache.put(token, user_id, payload.get("exp"))
         return user_id
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def forward_to_agent(agent_name: str, path: str, method: str = "GET", data: dict = None, headers: dict = None):
-    """Forward request to specific agent service"""
+def rate_limited(route: str):
+    """Dependency that authenticates the user and charges the route's cost to their token bucket"""
+    cost = ROUTE_COSTS[route]
+    
+    def dependency(user_id: str = Depends(verify_token)):
+        retry_after = rate_limiter.acquire(user_id, cost)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        return user_id
+    
+    return dependency
+
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    if INTERNAL_API_TOKEN and x_internal_token != INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+def with_query(path: str, **params) -> str:
+    """Append URL-encoded query parameters to an agent path, skipping unset ones"""
+    query = urlencode({key: value for key, value in params.items() if value is not None})
+    return f"{path}?{query}" if query else path
+
+async def send_to_agent(agent_name: str, method: str, path: str, data: dict = None, headers: dict = None, stream: bool = False, read_timeout: float = None, hold_slot: bool = True):
+    """Send a request through the agent's circuit breaker, bulkhead and adaptive timeout
+    
+    read_timeout replaces the adaptive timeout for long-lived responses such as event streams.
+    With stream=True this returns (response, release): the replica stays counted as busy,
+    and unless hold_slot is False the bulkhead slot stays taken, until release(failed) is
+    called once the body has been relayed.
+    """
     if agent_name not in AGENT_SERVICES:
         raise HTTPException(status_code=404, detail=f"Agent {agent_name} not found")
     
-    agent_url = AGENT_SERVICES[agent_name]
-    url = f"{agent_url}{path}"
-    
-    async with httpx.AsyncClient() as client:
-        if method == "GET":
-            response = await client.get(url, headers=headers)
-        elif method == "POST":
-            response = await client.post(url, json=data, headers=headers)
-        elif method == "PUT":
-            response = await client.put(url, json=data, headers=headers)
-        elif method == "DELETE":
-            response = await client.delete(url, headers=headers)
-        else:
-            raise HTTPException(status_code=405, detail="Method not allowed")
+    guard = agent_guards[agent_name]
+    try:
+        started = await guard.acquire()
+    except AgentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    replicas = load_balancer[agent_name]
+    replica = replicas.choose()
+    client = agent_pool.get_client(agent_name)
+    config = agent_pool.configs[agent_name]
+    adaptive_timeout = guard.timeout_for(method)
+    timeout = httpx.Timeout(
+        adaptive_timeout,
+        connect=config.connect_timeout,
+        read=read_timeout if read_timeout is not None else adaptive_timeout,
+        pool=config.pool_timeout,
+    )
+    request = client.build_request(
+        method,
+        f"{replica.url}{path}",
+        json=data if method in ("POST", "PUT") else None,
+        headers=headers,
+        timeout=timeout,
+    )
+    try:
+        response = await client.send(request, stream=stream)
+    except httpx.TimeoutException:
+        replicas.release(replica, success=False)
+        guard.release(method, started, success=False, timed_out=True)
+        raise HTTPException(status_code=504, detail=f"Agent {agent_name} timed out")
+    except httpx.RequestError as e:
+        replicas.release(replica, success=False)
+        guard.release(method, started, success=False)
+        raise HTTPException(status_code=502, detail=f"Agent {agent_name} unavailable: {str(e)}")
+    except BaseException:
+        replicas.release(replica, success=True)
+        guard.release(method, started, success=None)
+        raise
+    
+    success = response.status_code < 500
+    if not stream:
+        replicas.release(replica, success=success)
+        guard.release(method, started, success=success)
+        return response
+    
+    # The breaker and adaptive timeout judge the agent by the time to response headers
+    guard.record(method, started, success=success)
+    if not hold_slot:
+        guard.release_slot()
+    
+    def release(failed: bool):
+        replicas.release(replica, success=success and not failed)
+        if hold_slot:
+            guard.release_slot()
+    
+    return response, release
+
+async def forward_to_agent(agent_name: str, path: str, method: str = "GET", data: dict = None, headers: dict = None):
+    """Forward request to specific agent service"""
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        raise HTTPException(status_code=405, detail="Method not allowed")
+    
+    async with agent_pool.track(agent_name):
+        response = await send_to_agent(agent_name, method, path, data, headers)
     
     return response.json()
 
+# Hop-by-hop headers are connection specific and must not be relayed by a proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
+}
+
+async def stream_from_agent(agent_name: str, path: str, method: str = "GET", data: dict = None, headers: dict = None, read_timeout: float = None, hold_slot: bool = True):
+    """Relay an agent response byte-for-byte, preserving its status code and headers
+    
+    The agent's bulkhead slot is held until the relay closes; hold_slot=False exempts
+    long-lived, mostly idle streams from the concurrency cap.
+    """
+    # Ask for an unencoded body so the relayed bytes never need re-encoding here
+    request_headers = {"Accept-Encoding": "identity", **(headers or {})}
+    
+    started = agent_pool.begin(agent_name)
+    try:
+        response, release = await send_to_agent(agent_name, method, path, data, request_headers, stream=True, read_timeout=read_timeout, hold_slot=hold_slot)
+    except BaseException:
+        agent_pool.end(agent_name, started, failed=True)
+        raise
+    
+    failed = False
+    closed = False
+    
+    async def close():
+        # Runs from relay() and again as the background task, which Starlette awaits
+        # even when the client disconnects before the body is iterated
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            await response.aclose()
+        finally:
+            release(failed)
+            agent_pool.end(agent_name, started, failed or response.status_code >= 500)
+    
+    async def relay():
+        nonlocal failed
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        except Exception:
+            failed = True
+            raise
+        finally:
+            await close()
+    
+    response_headers = {
+        key: value for key, value in response.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    return StreamingResponse(
+        relay(), status_code=response.status_code, headers=response_headers,
+        background=BackgroundTask(close),
+    )
+
+async def fetch_from_agent(agent_name: str, path: str) -> httpx.Response:
+    """GET a fully-read agent response, sharing one upstream request among concurrent identical callers"""
+    async def fetch():
+        async with agent_pool.track(agent_name):
+            return await send_to_agent(agent_name, "GET", path)
+    
+    return await upstream_flights.do((agent_name, path), fetch)
+
+async def coalesced_get(agent_name: str, path: str):
+    """Relay a coalesced agent GET, preserving its status code"""
+    response = await fetch_from_agent(agent_name, path)
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type"),
+    )
+
+async def cached_course_read(request: Request, user_id: str, course_id: str, path: str):
+    """Serve a course read from the response cache, answering 304 when the client's ETag matches"""
+    entry = response_cache.get(user_id, path)
+    if entry is None:
+        response = await fetch_from_agent("course-generation", path)
+        if response.status_code != 200:
+            return Response(
+                content=response.content,
+                status_code=response.status_code,
+                media_type=response.headers.get("content-type"),
+            )
+        entry = response_cache.put(
+            user_id,
+            path,
+            course_id,
+            response.content,
+            response.headers.get("content-type", "application/json"),
+            response.headers.get("x-course-status"),
+        )
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
 @app.get("/")
 async def root():
     return {"message": "StudyMate API Gateway", "version": "1.0.0"}
@@ -85,6 +333,19 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "agent_pools": agent_pool.get_stats(),
+        "token_cache": token_cache.get_stats(),
+        "revoked_tokens": revoked_tokens.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "coalescing": upstream_flights.get_stats(),
+        "agent_guards": agent_guards.get_stats(),
+        "replicas": load_balancer.get_stats(),
+        "rate_limit": rate_limiter.get_stats(),
+    }
+
 # Authentication endpoints
 @app.post("/auth/signin")
 async def sign_in(credentials: dict):
@@ -132,55 +393,124 @@ async def sign_up(user_data: dict):
     }
 
 @app.post("/auth/signout")
-async def sign_out(user_id: str = Depends(verify_token)):
+async def sign_out(user_id: str = Depends(verify_token), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    # verify_token has already checked the signature; an exp passed since then needs no revoking
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"verify_exp": False})
+    revoked_tokens.revoke(token, payload.get("exp"))
+    token_cache.invalidate(token)
     return {"message": "Signed out successfully"}
 
 # Course Generation Routes
 @app.post("/courses/generate")
-async def generate_course(course_data: dict, user_id: str = Depends(verify_token)):
+async def generate_course(course_data: dict, user_id: str = Depends(rate_limited("course_generate"))):
     course_data["user_id"] = user_id
     return await forward_to_agent("course-generation", "/generate", "POST", course_data)
 
 @app.get("/courses")
-async def get_courses(user_id: str = Depends(verify_token)):
-    return await forward_to_agent("course-generation", f"/courses?user_id={user_id}", "GET")
+async def get_courses(fields: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None, user_id: str = Depends(rate_limited("read"))):
+    return await stream_from_agent("course-generation", with_query("/courses", user_id=user_id, fields=fields, cursor=cursor, limit=limit))
+
+@app.get("/courses/export")
+async def export_courses(format: str = "ndjson", user_id: str = Depends(rate_limited("export"))):
+    return await stream_from_agent("course-generation", with_query("/courses/export", user_id=user_id, format=format), read_timeout=EXPORT_READ_TIMEOUT)
+
+@app.get("/courses/{course_id}/export")
+async def export_course(course_id: str, format: str = "ndjson", user_id: str = Depends(rate_limited("export"))):
+    return await stream_from_agent("course-generation", with_query(f"/courses/{course_id}/export", user_id=user_id, format=format), read_timeout=EXPORT_READ_TIMEOUT)
 
 @app.get("/courses/{course_id}")
-async def get_course(course_id: str, user_id: str = Depends(verify_token)):
-    return await forward_to_agent("course-generation", f"/courses/{course_id}", "GET")
+async def get_course(course_id: str, request: Request, fields: Optional[str] = None, user_id: str = Depends(rate_limited("read"))):
+    return await cached_course_read(request, user_id, course_id, with_query(f"/courses/{course_id}", fields=fields))
 
 @app.get("/courses/{course_id}/content")
-async def get_course_content(course_id: str, user_id: str = Depends(verify_token)):
-    return await forward_to_agent("course-generation", f"/courses/{course_id}/content", "GET")
+async def get_course_content(course_id: str, request: Request, sections: Optional[str] = None, user_id: str = Depends(rate_limited("read"))):
+    return await cached_course_read(request, user_id, course_id, with_query(f"/courses/{course_id}/content", sections=sections))
+
+@app.get("/courses/{course_id}/events")
+async def get_course_events(course_id: str, user_id: str = Depends(rate_limited("read"))):
+    """Server-sent chapter and status events, pushed until the course is complete or has failed"""
+    # Event streams stay open, mostly idle, for a whole generation, so they must not use up
+    # the bulkhead slots course reads need; the replica still counts them as outstanding
+    return await stream_from_agent("course-generation", f"/courses/{course_id}/events", read_timeout=COURSE_EVENTS_READ_TIMEOUT, hold_slot=False)
+
+# Internal notifications from agents
+@app.post("/internal/courses/{course_id}/status")
+async def course_status_changed(course_id: str, status_data: dict, _: None = Depends(verify_internal_token)):
+    response_cache.invalidate_course(course_id)
+    return {"course_id": course_id, "status": status_data.get("status"), "invalidated": True}
 
 # Interview Routes
 @app.post("/interviews/start")
-async def start_interview(interview_data: dict, user_id: str = Depends(verify_token)):
+async def start_interview(interview_data: dict, user_id: str = Depends(rate_limited("interview_start"))):
     interview_data["user_id"] = user_id
     return await forward_to_agent("interview-coach", "/start", "POST", interview_data)
 
 @app.get("/interviews")
-async def get_interviews(user_id: str = Depends(verify_token)):
-    return await forward_to_agent("interview-coach", f"/interviews?user_id={user_id}", "GET")
+async def get_interviews(fields: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None, user_id: str = Depends(rate_limited("read"))):
+    return await stream_from_agent("interview-coach", with_query("/interviews", user_id=user_id, fields=fields, cursor=cursor, limit=limit))
 
 @app.get("/interviews/{interview_id}")
-async def get_interview(interview_id: str, user_id: str = Depends(verify_token)):
-    return await forward_to_agent("interview-coach", f"/interviews/{interview_id}", "GET")
+async def get_interview(interview_id: str, user_id: str = Depends(rate_limited("read"))):
+    return await coalesced_get("interview-coach", f"/interviews/{interview_id}")
 
 @app.post("/interviews/{interview_id}/analyze")
-async def analyze_interview(interview_id: str, analysis_data: dict, user_id: str = Depends(verify_token)):
+async def analyze_interview(interview_id: str, analysis_data: dict, user_id: str = Depends(rate_limited("write"))):
     return await forward_to_agent("interview-coach", f"/interviews/{interview_id}/analyze", "POST", analysis_data)
 
 # Chat Routes
 @app.post("/chat/message")
-async def send_message(message_data: dict, user_id: str = Depends(verify_token)):
+async def send_message(message_data: dict, user_id: str = Depends(rate_limited("chat"))):
     message_data["user_id"] = user_id
     return await forward_to_agent("chat-mentor", "/message", "POST", message_data)
 
+# Dashboard Routes
+async def fetch_dashboard_section(agent_name: str, path: str):
+    """Fetch one dashboard section, giving up after DASHBOARD_SECTION_TIMEOUT"""
+    response = await asyncio.wait_for(fetch_from_agent(agent_name, path), timeout=DASHBOARD_SECTION_TIMEOUT)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=f"Agent {agent_name} returned {response.status_code}")
+    return response.json().get("data")
+
+@app.get("/dashboard")
+async def get_dashboard(user_id: str = Depends(rate_limited("dashboard"))):
+    """Courses, interviews and progress in one round trip, fetched from the agents concurrently"""
+    sections = {
+        "courses": ("course-generation", with_query("/courses", user_id=user_id, fields=DASHBOARD_COURSE_FIELDS, limit=DASHBOARD_LIST_LIMIT)),
+        "interviews": ("interview-coach", with_query("/interviews", user_id=user_id, limit=DASHBOARD_LIST_LIMIT)),
+        "progress": ("progress-analyst", with_query("/progress", user_id=user_id)),
+    }
+    results = await asyncio.gather(
+        *(fetch_dashboard_section(agent_name, path) for agent_name, path in sections.values()),
+        return_exceptions=True,
+    )
+    
+    dashboard = {}
+    errors = {}
+    for section, result in zip(sections, results):
+        if isinstance(result, asyncio.TimeoutError):
+            dashboard[section] = None
+            errors[section] = "timed out"
+        elif isinstance(result, HTTPException):
+            dashboard[section] = None
+            errors[section] = result.detail
+        elif isinstance(result, Exception):
+            dashboard[section] = None
+            errors[section] = str(result)
+        else:
+            dashboard[section] = result
+    
+    return {
+        "success": True,
+        "data": dashboard,
+        "partial": bool(errors),
+        "errors": errors,
+    }
+
 # Progress Routes
 @app.get("/progress")
-async def get_progress(user_id: str = Depends(verify_token)):
-    return await forward_to_agent("progress-analyst", f"/progress?user_id={user_id}", "GET")
+async def get_progress(user_id: str = Depends(rate_limited("read"))):
+    return await stream_from_agent("progress-analyst", with_query("/progress", user_id=user_id))
 
 if __name__ == "__main__":
     import uvicorn
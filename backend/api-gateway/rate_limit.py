@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+# Every user gets a bucket of RATE_LIMIT_CAPACITY tokens refilled at RATE_LIMIT_REFILL_RATE per second
+RATE_LIMIT_CAPACITY = float(os.getenv("RATE_LIMIT_CAPACITY", "60"))
+RATE_LIMIT_REFILL_RATE = float(os.getenv("RATE_LIMIT_REFILL_RATE", "1"))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+# Idle buckets are pruned once a shard holds more than this many users
+RATE_LIMIT_SHARD_PRUNE_SIZE = int(os.getenv("RATE_LIMIT_SHARD_PRUNE_SIZE", "10000"))
+
+# Route cost weights, in tokens
+ROUTE_COSTS = {
+    "read": float(os.getenv("RATE_LIMIT_COST_READ", "1")),
+    "dashboard": float(os.getenv("RATE_LIMIT_COST_DASHBOARD", "3")),
+    "write": float(os.getenv("RATE_LIMIT_COST_WRITE", "2")),
+    "chat": float(os.getenv("RATE_LIMIT_COST_CHAT", "3")),
+    "export": float(os.getenv("RATE_LIMIT_COST_EXPORT", "10")),
+    "interview_start": float(os.getenv("RATE_LIMIT_COST_INTERVIEW_START", "15")),
+    "course_generate": float(os.getenv("RATE_LIMIT_COST_COURSE_GENERATE", "30")),
+}
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # user -> (tokens, last refill time)
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+
+
+class TokenBucketLimiter:
+    """Per-user token buckets, spread across independently locked shards"""
+
+    def __init__(self, capacity: float = RATE_LIMIT_CAPACITY, refill_rate: float = RATE_LIMIT_REFILL_RATE, shards: int = RATE_LIMIT_SHARDS):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._shards: List[_Shard] = [_Shard() for _ in range(max(1, shards))]
+        self.allowed = 0
+        self.rejected = 0
+
+    def _shard_for(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def acquire(self, key: str, cost: float) -> float:
+        """Take cost tokens from the key's bucket
+
+        Returns 0 when the request is admitted, otherwise the seconds until enough tokens
+        will have refilled.
+        """
+        # A cost above capacity could never be paid, so charge a full bucket instead
+        cost = min(cost, self.capacity)
+        shard = self._shard_for(key)
+        now = time.monotonic()
+        with shard.lock:
+            tokens, updated = shard.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+            if tokens >= cost:
+                shard.buckets[key] = (tokens - cost, now)
+                if len(shard.buckets) > RATE_LIMIT_SHARD_PRUNE_SIZE:
+                    self._prune(shard, now)
+                self.allowed += 1
+                return 0.0
+            shard.buckets[key] = (tokens, now)
+            self.rejected += 1
+            return (cost - tokens) / self.refill_rate
+
+    def _prune(self, shard: _Shard, now: float):
+        # A bucket that would be full by now is indistinguishable from a missing one
+        full_after = self.capacity / self.refill_rate
+        for key, (tokens, updated) in list(shard.buckets.items()):
+            if now - updated >= full_after:
+                del shard.buckets[key]
+
+    def get_stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "refill_rate": self.refill_rate,
+            "shards": len(self._shards),
+            "tracked_users": sum(len(shard.buckets) for shard in self._shards),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "route_costs": ROUTE_COSTS,
+        }
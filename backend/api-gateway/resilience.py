@@ -0,0 +1,224 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from agent_pool import agent_env
+
+# Defaults, overridable per agent, e.g. INTERVIEW_COACH_MAX_CONCURRENCY=10
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "50"))
+DEFAULT_QUEUE_TIMEOUT = float(os.getenv("AGENT_QUEUE_TIMEOUT", "1"))
+DEFAULT_TIMEOUT_MIN = float(os.getenv("AGENT_TIMEOUT_MIN", "1"))
+DEFAULT_TIMEOUT_MAX = float(os.getenv("AGENT_TIMEOUT_MAX", "30"))
+DEFAULT_TIMEOUT_MULTIPLIER = float(os.getenv("AGENT_TIMEOUT_MULTIPLIER", "3"))
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("AGENT_FAILURE_THRESHOLD", "5"))
+DEFAULT_RESET_TIMEOUT = float(os.getenv("AGENT_RESET_TIMEOUT", "30"))
+DEFAULT_HALF_OPEN_PROBES = int(os.getenv("AGENT_HALF_OPEN_PROBES", "1"))
+
+# Latency samples kept per (agent, method) and needed before the timeout adapts
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class AgentUnavailableError(Exception):
+    """Raised when an agent call is rejected before it reaches the agent"""
+
+    def __init__(self, agent_name: str, reason: str, retry_after: int = 1):
+        super().__init__(f"Agent {agent_name} unavailable: {reason}")
+        self.agent_name = agent_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_probes: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; admits limited probes once the open period has passed"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.probes_in_flight = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def retry_after(self) -> int:
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probes_in_flight = 0
+        self.times_opened += 1
+
+
+class AdaptiveTimeout:
+    """Read timeout derived from the recent p99 latency, clamped to [min, max]"""
+
+    def __init__(self, minimum: float, maximum: float, multiplier: float):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.samples: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def current(self) -> float:
+        # Until there is enough history, allow the agent the full budget
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return self.maximum
+        return min(self.maximum, max(self.minimum, self.percentile(0.99) * self.multiplier))
+
+
+class AgentGuard:
+    """Circuit breaker, bulkhead and adaptive timeouts protecting calls to one agent"""
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.max_concurrency = int(agent_env(agent_name, "MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self.queue_timeout = float(agent_env(agent_name, "QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT))
+        self.timeout_min = float(agent_env(agent_name, "TIMEOUT_MIN", DEFAULT_TIMEOUT_MIN))
+        self.timeout_max = float(agent_env(agent_name, "TIMEOUT_MAX", DEFAULT_TIMEOUT_MAX))
+        self.timeout_multiplier = float(agent_env(agent_name, "TIMEOUT_MULTIPLIER", DEFAULT_TIMEOUT_MULTIPLIER))
+        self.breaker = CircuitBreaker(
+            int(agent_env(agent_name, "FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+            float(agent_env(agent_name, "RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)),
+            int(agent_env(agent_name, "HALF_OPEN_PROBES", DEFAULT_HALF_OPEN_PROBES)),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Slow LLM-backed POSTs must not inflate the timeout budget of quick reads
+        self._timeouts: Dict[str, AdaptiveTimeout] = {}
+        self.in_flight = 0
+        self.rejected_open = 0
+        self.rejected_full = 0
+        self.timeouts = 0
+
+    def timeout_for(self, method: str) -> float:
+        return self._adaptive(method).current()
+
+    def _adaptive(self, method: str) -> AdaptiveTimeout:
+        adaptive = self._timeouts.get(method)
+        if adaptive is None:
+            adaptive = AdaptiveTimeout(self.timeout_min, self.timeout_max, self.timeout_multiplier)
+            self._timeouts[method] = adaptive
+        return adaptive
+
+    async def acquire(self) -> float:
+        """Admit a call through the breaker and bulkhead and return its start time"""
+        if not self.breaker.allow():
+            self.rejected_open += 1
+            raise AgentUnavailableError(self.agent_name, "circuit open", self.breaker.retry_after())
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_full += 1
+            # The breaker admitted this call, so a half-open probe slot must be handed back
+            if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.breaker.probes_in_flight -= 1
+            raise AgentUnavailableError(self.agent_name, "too many concurrent requests")
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, method: str, started: float, success: Optional[bool], timed_out: bool = False):
+        """Release the bulkhead slot and feed the outcome to the breaker and timeout tracker"""
+        self.release_slot()
+        self.record(method, started, success, timed_out)
+
+    def release_slot(self):
+        """Give back the bulkhead slot; a streamed response keeps it until the stream closes"""
+        self._semaphore.release()
+        self.in_flight -= 1
+
+    def record(self, method: str, started: float, success: Optional[bool], timed_out: bool = False):
+        """Feed the outcome of a call to the breaker and timeout tracker
+
+        ``success=None`` marks a call abandoned by its caller, which says nothing about the agent.
+        """
+        if success is None:
+            if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.breaker.probes_in_flight = max(0, self.breaker.probes_in_flight - 1)
+            return
+        latency = time.monotonic() - started
+        if timed_out:
+            self.timeouts += 1
+        self._adaptive(method).record(latency)
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def get_stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "rejected_open": self.rejected_open,
+            "rejected_full": self.rejected_full,
+            "timeouts": self.timeouts,
+            "timeouts_by_method": {
+                method: {
+                    "current_timeout": round(adaptive.current(), 3),
+                    "p50_ms": round(adaptive.percentile(0.5) * 1000, 2),
+                    "p99_ms": round(adaptive.percentile(0.99) * 1000, 2),
+                    "samples": len(adaptive.samples),
+                }
+                for method, adaptive in self._timeouts.items()
+            },
+        }
+
+
+class AgentGuards:
+    """Lazily created AgentGuard per agent name"""
+
+    def __init__(self, agent_names):
+        self._guards: Dict[str, AgentGuard] = {name: AgentGuard(name) for name in agent_names}
+
+    def __getitem__(self, agent_name: str) -> AgentGuard:
+        guard = self._guards.get(agent_name)
+        if guard is None:
+            guard = AgentGuard(agent_name)
+            self._guards[agent_name] = guard
+        return guard
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {name: guard.get_stats() for name, guard in self._guards.items()}
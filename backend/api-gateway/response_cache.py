@@ -0,0 +1,115 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Finished courses only change when the agent says so, so they can live long
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Courses still generating are re-read periodically in case a status notification is lost
+RESPONSE_CACHE_PENDING_TTL = float(os.getenv("RESPONSE_CACHE_PENDING_TTL", "5"))
+
+TERMINAL_STATUSES = {"complete", "error"}
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Weak comparison is what RFC 9110 prescribes for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str
+    status: Optional[str]
+    expires_at: float
+
+
+class ResponseCache:
+    """In-memory cache of agent responses keyed by (user, route)"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        # Lets a single course status change drop every cached route for that course
+        self._keys_by_course: Dict[str, Set[Tuple[str, str]]] = {}
+        self._course_by_key: Dict[Tuple[str, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str, path: str) -> Optional[CachedResponse]:
+        key = (user_id, path)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, user_id: str, path: str, course_id: str, body: bytes, media_type: str, status: Optional[str]) -> CachedResponse:
+        """Store a response body and return the cached entry with its ETag"""
+        ttl = RESPONSE_CACHE_TTL if status in TERMINAL_STATUSES else RESPONSE_CACHE_PENDING_TTL
+        key = (user_id, path)
+        entry = CachedResponse(
+            body=body,
+            etag=compute_etag(body),
+            media_type=media_type,
+            status=status,
+            expires_at=time.monotonic() + ttl,
+        )
+        self._remove(key)
+        self._entries[key] = entry
+        self._keys_by_course.setdefault(course_id, set()).add(key)
+        self._course_by_key[key] = course_id
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+        return entry
+
+    def invalidate_course(self, course_id: str):
+        """Drop every cached response belonging to a course"""
+        for key in self._keys_by_course.pop(course_id, set()):
+            self._entries.pop(key, None)
+            self._course_by_key.pop(key, None)
+            self.invalidations += 1
+
+    def _remove(self, key: Tuple[str, str]):
+        self._entries.pop(key, None)
+        course_id = self._course_by_key.pop(key, None)
+        if course_id is not None:
+            keys = self._keys_by_course.get(course_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_course[course_id]
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight call"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key at a time; concurrent callers share its result"""
+        task = self._calls.get(key)
+        if task is None:
+            # Run the call as its own task so a cancelled caller doesn't cancel it for the others
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        requests = self.executed + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+        }
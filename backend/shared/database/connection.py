@@ -6,6 +6,8 @@ from typing import Optional
 # MongoDB configuration
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "studymate_db")
+# Multi-document transactions need a replica set; the standalone dev server has none
+MONGODB_TRANSACTIONS = os.getenv("MONGODB_TRANSACTIONS", "false").lower() == "true"
 
 class DatabaseManager:
     def __init__(self):
@@ -35,6 +37,12 @@ class DatabaseManager:
         if not self.database:
             raise Exception("Database not connected")
         return self.database[collection_name]
+    
+    async def start_session(self):
+        """Start a client session, e.g. for a transaction"""
+        if not self.client:
+            raise Exception("Database not connected")
+        return await self.client.start_session()
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -58,6 +66,9 @@ async def get_mcqs_collection():
 async def get_qnas_collection():
     return db_manager.get_collection("qnas")
 
+async def get_course_sections_collection():
+    return db_manager.get_collection("course_sections")
+
 async def get_mock_interviews_collection():
     return db_manager.get_collection("mock_interviews")
 
@@ -73,6 +84,15 @@ async def get_progress_tracking_collection():
 async def get_dsa_problems_collection():
     return db_manager.get_collection("dsa_problems")
 
+async def get_jobs_collection():
+    return db_manager.get_collection("jobs")
+
+async def get_course_content_cache_collection():
+    return db_manager.get_collection("course_content_cache")
+
+async def get_llm_budget_collection():
+    return db_manager.get_collection("llm_budget")
+
 # Utility functions
 async def init_database():
     """Initialize database connection and create indexes"""
@@ -82,18 +102,34 @@ async def init_database():
     users_collection = await get_users_collection()
     await users_collection.create_index("email", unique=True)
     
+    # _id breaks created_at ties so keyset pagination can resume from any item
     courses_collection = await get_courses_collection()
-    await courses_collection.create_index([("user_id", 1), ("created_at", -1)])
+    await courses_collection.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
     
     chapters_collection = await get_chapters_collection()
     await chapters_collection.create_index([("course_id", 1), ("order_number", 1)])
     
+    for get_collection in (get_flashcards_collection, get_mcqs_collection, get_qnas_collection):
+        await (await get_collection()).create_index("course_id")
+    
     mock_interviews_collection = await get_mock_interviews_collection()
-    await mock_interviews_collection.create_index([("user_id", 1), ("created_at", -1)])
+    await mock_interviews_collection.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
     
     progress_collection = await get_progress_tracking_collection()
     await progress_collection.create_index([("user_id", 1), ("activity_type", 1), ("created_at", -1)])
     
+    jobs_collection = await get_jobs_collection()
+    await jobs_collection.create_index([("type", 1), ("status", 1), ("run_at", 1)])
+    await jobs_collection.create_index([("status", 1), ("lease_expires_at", 1)])
+    
+    # Entries are removed by MongoDB once expires_at has passed
+    course_content_cache_collection = await get_course_content_cache_collection()
+    await course_content_cache_collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Per-minute LLM token usage windows, kept briefly after the minute is over
+    llm_budget_collection = await get_llm_budget_collection()
+    await llm_budget_collection.create_index("expires_at", expireAfterSeconds=0)
+    
     print("Database indexes created successfully!")
 
 async def close_database():
@@ -0,0 +1,87 @@
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from shared.models.schemas import PaginatedResponse
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor= parameter was not produced by encode_cursor"""
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past doc in (created_at, _id) descending order"""
+    doc_id = doc["_id"]
+    payload = {
+        "c": doc["created_at"].isoformat(),
+        "i": str(doc_id),
+        "o": isinstance(doc_id, ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(payload["c"])
+        doc_id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    return created_at, doc_id
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, int]] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> PaginatedResponse:
+    """Fetch one page of query, newest first, using keyset pagination
+
+    Each page is a range scan that starts where the previous one stopped on the
+    (..., created_at, _id) index, so deep pages cost the same as the first. The
+    raw documents are returned in items; total and page are not computed.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, doc_id = decode_cursor(cursor)
+        query = {
+            "$and": [
+                query,
+                {"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": doc_id}},
+                ]},
+            ]
+        }
+
+    # The cursor of the last item needs created_at even when it was not asked for
+    strip_created_at = projection is not None and "created_at" not in projection
+    if strip_created_at:
+        projection = {**projection, "created_at": 1}
+
+    docs = await collection.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+    has_next = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]) if has_next else None
+    if strip_created_at:
+        for doc in docs:
+            doc.pop("created_at", None)
+
+    return PaginatedResponse(
+        items=docs,
+        per_page=limit,
+        has_next=has_next,
+        has_prev=cursor is not None,
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,45 @@
+import re
+from typing import Dict, Optional
+
+# Dotted field paths such as "title" or "content.status"; "$" operators are never allowed
+FIELD_PATH_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+MAX_PROJECTED_FIELDS = 50
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a fields= parameter cannot be turned into a projection"""
+
+
+def build_projection(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    """Turn a comma-separated fields= value into a MongoDB inclusion projection
+
+    Returns None when no fields were requested, meaning the whole document.
+    "id" is accepted as an alias for "_id", which MongoDB always includes anyway.
+    """
+    if not fields:
+        return None
+
+    projection: Dict[str, int] = {}
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if field == "id":
+            field = "_id"
+        elif not FIELD_PATH_PATTERN.match(field):
+            raise InvalidFieldsError(f"Invalid field name: {field}")
+        projection[field] = 1
+
+    if len(projection) > MAX_PROJECTED_FIELDS:
+        raise InvalidFieldsError(f"At most {MAX_PROJECTED_FIELDS} fields may be requested")
+
+    # Requesting both "content" and "content.status" is a path collision in MongoDB 4.4+
+    for field in list(projection):
+        parent = field
+        while "." in parent:
+            parent = parent.rsplit(".", 1)[0]
+            if parent in projection:
+                del projection[field]
+                break
+
+    return projection or None
@@ -0,0 +1,56 @@
+import asyncio
+import contextlib
+import os
+from typing import Any, Dict, Iterator, Set
+
+# Events buffered per subscriber; a subscriber that falls further behind loses the oldest
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+
+class EventHub:
+    """In-process publish/subscribe of events keyed by topic, such as a course id
+
+    Must only be used from the event loop's thread.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @contextlib.contextmanager
+    def subscribe(self, key: str) -> Iterator[asyncio.Queue]:
+        """Receive the events published for key while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(key, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def publish(self, key: str, event: Any) -> int:
+        """Deliver event to every current subscriber of key and return how many there were"""
+        self.published += 1
+        subscribers = self._subscribers.get(key, ())
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+            self.delivered += 1
+        return len(subscribers)
+
+    def get_stats(self) -> dict:
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,125 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+# A claimed job belongs to its worker until the lease expires; heartbeats extend it
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff before the next attempt of a job that has run `attempts` times"""
+    return min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+class JobQueue:
+    """Durable job queue stored in a MongoDB collection
+
+    Workers claim jobs with a lease. A job whose worker crashed keeps status
+    "running" with an expired lease and is claimed again by the next worker.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], job_id: Optional[str] = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> str:
+        """Add a job that is runnable immediately and return its id"""
+        now = datetime.utcnow()
+        job_id = job_id or str(uuid.uuid4())
+        await self.collection.insert_one({
+            "_id": job_id,
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        return job_id
+
+    async def claim(self, worker_id: str, job_types: List[str]) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due job, including jobs stranded by a dead worker"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "type": {"$in": job_types},
+                "$or": [
+                    {"status": QUEUED, "run_at": {"$lte": now}},
+                    {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease; False means the job was reclaimed by another worker"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": RUNNING, "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id: str, worker_id: str) -> bool:
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": RUNNING, "lease_owner": worker_id},
+            {"$set": {
+                "status": SUCCEEDED,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": datetime.utcnow(),
+            }},
+        )
+        return result.matched_count == 1
+
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        """Record a failed attempt; requeue with backoff or mark the job failed for good
+
+        Returns the job's new status.
+        """
+        now = datetime.utcnow()
+        if job["attempts"] >= job.get("max_attempts", JOB_MAX_ATTEMPTS):
+            update = {"status": FAILED, "run_at": now}
+        else:
+            update = {"status": QUEUED, "run_at": now + timedelta(seconds=retry_delay(job["attempts"]))}
+        update.update({
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": error,
+            "updated_at": now,
+        })
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": RUNNING, "lease_owner": worker_id},
+            {"$set": update},
+        )
+        return update["status"]
+
+    async def get_stats(self) -> Dict[str, int]:
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        return {row["_id"]: row["count"] async for row in self.collection.aggregate(pipeline)}
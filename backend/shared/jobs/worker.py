@@ -0,0 +1,104 @@
+import asyncio
+import os
+import socket
+import traceback
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from shared.jobs.queue import JobQueue, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, FAILED
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 3)))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+
+class JobWorker:
+    """Drains a JobQueue with bounded concurrency, heartbeating each job's lease"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        on_failure: Optional[FailureHandler] = None,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.on_failure = on_failure
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._slots = asyncio.Semaphore(concurrency)
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        """Claim and run jobs until stop() is called"""
+        print(f"Job worker {self.worker_id} started with concurrency {self.concurrency}")
+        tasks = set()
+        while not self._stopping:
+            await self._slots.acquire()
+            try:
+                job = await self.queue.claim(self.worker_id, list(self.handlers))
+            except Exception as e:
+                self._slots.release()
+                print(f"Job worker {self.worker_id} failed to claim a job: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            if job is None:
+                self._slots.release()
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(self._run_job(job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        try:
+            # A job reclaimed after a crash may already have used up its attempts
+            if job["attempts"] > job.get("max_attempts", JOB_MAX_ATTEMPTS):
+                await self._fail(job, job.get("last_error") or "Lease expired too many times")
+                return
+
+            handler = self.handlers[job["type"]]
+            work = asyncio.create_task(handler(job["payload"]))
+            heartbeat = asyncio.create_task(self._heartbeat(job, work))
+            try:
+                await work
+            except asyncio.CancelledError:
+                print(f"Job {job['_id']} lost its lease and was abandoned")
+                return
+            except Exception as e:
+                traceback.print_exc()
+                await self._fail(job, str(e))
+                return
+            finally:
+                heartbeat.cancel()
+
+            await self.queue.complete(job["_id"], self.worker_id)
+        finally:
+            self._slots.release()
+
+    async def _heartbeat(self, job: Dict[str, Any], work: asyncio.Task):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                still_owned = await self.queue.heartbeat(job["_id"], self.worker_id)
+            except Exception as e:
+                print(f"Heartbeat for job {job['_id']} failed: {e}")
+                continue
+            if not still_owned:
+                work.cancel()
+                return
+
+    async def _fail(self, job: Dict[str, Any], error: str):
+        status = await self.queue.fail(job, self.worker_id, error)
+        print(f"Job {job['_id']} attempt {job['attempts']} failed ({status}): {error}")
+        if status == FAILED and self.on_failure is not None:
+            await self.on_failure(job, error)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+# "record" calls the model and stores every response, "replay" answers from the store only
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", "llm_cassettes")
+# Replayed response time: "recorded", "fixed:S", "uniform:MIN,MAX", "normal:MEAN,STDDEV" or
+# "lognormal:MU,SIGMA", in seconds. The distributions give the time to the first chunk;
+# the rest of the response then arrives at LLM_REPLAY_TOKENS_PER_SECOND.
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "recorded")
+LLM_REPLAY_TOKENS_PER_SECOND = float(os.getenv("LLM_REPLAY_TOKENS_PER_SECOND", "150"))
+# Same seed, same latencies for each prompt's nth replay, however calls interleave
+LLM_REPLAY_SEED = os.getenv("LLM_REPLAY_SEED", "0")
+# Chunks a response recorded without streaming is split into when replayed as a stream
+REPLAY_STREAM_CHUNKS = 16
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a prompt that was never recorded"""
+
+
+class ReplayResponse:
+    """A recorded response, with the attributes the agents read from SDK responses"""
+
+    def __init__(self, text: str, total_token_count: Optional[int] = None):
+        self.text = text
+        self.total_token_count = total_token_count
+
+
+class CassetteStore:
+    """Content-addressed store of model responses
+
+    objects/ holds each distinct response once, named by the SHA-256 of its contents;
+    prompts/ maps the SHA-256 of a request to the object and the timings it was recorded with.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def request_key(model_name: str, prompt: str, kwargs: dict) -> str:
+        request = {"model": model_name, "prompt": prompt, "options": kwargs}
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, kind: str, digest: str) -> str:
+        return os.path.join(self.root, kind, digest[:2], f"{digest}.json")
+
+    def _write(self, path: str, data: bytes):
+        # Readers in other processes never see a half-written file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def save(self, key: str, prompt: str, chunks: List[str], total_tokens: Optional[int], first_chunk: float, total: float):
+        body = json.dumps({"chunks": chunks, "total_tokens": total_tokens}, sort_keys=True).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._path("objects", digest)
+        if not os.path.exists(object_path):
+            self._write(object_path, body)
+        entry = {
+            "object": digest,
+            # Kept so recorded traffic can be sent again, see the benchmark below
+            "prompt": prompt,
+            "first_chunk_seconds": first_chunk,
+            "total_seconds": total,
+            "recorded_at": datetime.utcnow().isoformat()
+        }
+        self._write(self._path("prompts", key), json.dumps(entry).encode())
+
+    def entries(self):
+        """Every recorded prompts/ entry"""
+        prompts_dir = os.path.join(self.root, "prompts")
+        for dirpath, _, filenames in os.walk(prompts_dir):
+            for filename in filenames:
+                if filename.endswith(".json"):
+                    with open(os.path.join(dirpath, filename), "rb") as f:
+                        yield json.load(f)
+
+    def load(self, key: str):
+        """(entry, response) recorded for key, or None"""
+        try:
+            with open(self._path("prompts", key), "rb") as f:
+                entry = json.load(f)
+            with open(self._path("objects", entry["object"]), "rb") as f:
+                return entry, json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def parse_latency(spec: str) -> Callable[[random.Random, dict], float]:
+    """Sampler of the time to first chunk, given a seeded generator and the recorded entry"""
+    name, _, args = spec.partition(":")
+    params = [float(arg) for arg in args.split(",")] if args else []
+    if name == "recorded":
+        return lambda rng, entry: entry["first_chunk_seconds"]
+    if name == "fixed":
+        return lambda rng, entry: params[0]
+    if name == "uniform":
+        return lambda rng, entry: rng.uniform(params[0], params[1])
+    if name == "normal":
+        return lambda rng, entry: max(0.0, rng.gauss(params[0], params[1]))
+    if name == "lognormal":
+        return lambda rng, entry: rng.lognormvariate(params[0], params[1])
+    raise ValueError(f"Unknown LLM_REPLAY_LATENCY distribution: {spec}")
+
+
+def _split(text: str, parts: int) -> List[str]:
+    size = max(1, -(-len(text) // parts))
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class CassetteModel:
+    """Records the responses of model, or replays recorded ones without it
+
+    Has the SDK's generate_content signature, so every call site and the scheduler work unchanged.
+    """
+
+    def __init__(self, model, model_name: str, mode: str = LLM_CASSETTE_MODE, store: Optional[CassetteStore] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown LLM_CASSETTE_MODE: {mode}")
+        if mode == "record" and model is None:
+            raise ValueError("Recording needs a configured model")
+        self.model = model
+        self.model_name = model_name
+        self.mode = mode
+        self.store = store or CassetteStore(LLM_CASSETTE_DIR)
+        self.latency = parse_latency(LLM_REPLAY_LATENCY)
+        self._replays = {}
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        key = self.store.request_key(self.model_name, prompt, kwargs)
+        if self.mode == "record":
+            return self._record(key, prompt, stream, kwargs)
+        recording = self.store.load(key)
+        if recording is None:
+            raise CassetteMiss(f"No recorded response for prompt {key[:12]}")
+        replay = self._replay(key, *recording)
+        if stream:
+            return replay
+        # Sleep through the whole response like a non-streamed call would
+        return ReplayResponse("".join(chunk.text for chunk in replay), recording[1]["total_tokens"])
+
+    def _record(self, key: str, prompt: str, stream: bool, kwargs: dict):
+        started = time.perf_counter()
+        if not stream:
+            response = self.model.generate_content(prompt, **kwargs)
+            elapsed = time.perf_counter() - started
+            self.store.save(key, prompt, [response.text], response_tokens(response), elapsed, elapsed)
+            return response
+        return self._record_stream(key, prompt, kwargs, started)
+
+    def _record_stream(self, key: str, prompt: str, kwargs: dict, started: float):
+        chunks = []
+        first_chunk = None
+        total_tokens = None
+        for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            chunks.append(chunk.text)
+            total_tokens = response_tokens(chunk) or total_tokens
+            yield chunk
+        elapsed = time.perf_counter() - started
+        self.store.save(key, prompt, chunks, total_tokens, first_chunk or elapsed, elapsed)
+
+    def _replay(self, key: str, entry: dict, response: dict):
+        with self._lock:
+            count = self._replays.get(key, 0)
+            self._replays[key] = count + 1
+        rng = random.Random(f"{LLM_REPLAY_SEED}:{key}:{count}")
+        chunks = response["chunks"]
+        if len(chunks) == 1:
+            chunks = _split(chunks[0], REPLAY_STREAM_CHUNKS)
+        if LLM_REPLAY_LATENCY == "recorded":
+            rest = max(0.0, entry["total_seconds"] - entry["first_chunk_seconds"])
+        else:
+            # Output pace from the response size, roughly four characters per token
+            rest = sum(len(chunk) for chunk in chunks) / 4 / LLM_REPLAY_TOKENS_PER_SECOND
+        time.sleep(self.latency(rng, entry))
+        for index, text in enumerate(chunks):
+            if index:
+                time.sleep(rest / (len(chunks) - 1))
+            last = index == len(chunks) - 1
+            yield ReplayResponse(text, response["total_tokens"] if last else None)
+
+
+def response_tokens(response) -> Optional[int]:
+    """Tokens a response reports using, from the SDK, RestModel or a replay"""
+    count = getattr(response, "total_token_count", None)
+    if count is None:
+        count = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+    return count or None
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from shared.llm.gemini import generate_content_async, stream_content_async, get_llm_stats, LLM_MODEL
+
+    # Throughput benchmark over the recorded prompts: python -m shared.llm.cassette (from backend/)
+    parser = argparse.ArgumentParser(description="Replay recorded model calls through the LLM scheduler")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16, help="callers issuing requests at once")
+    parser.add_argument("--stream", action="store_true", help="replay as streamed calls")
+    args = parser.parse_args()
+
+    async def benchmark():
+        model = CassetteModel(None, LLM_MODEL, mode="replay")
+        prompts = [entry["prompt"] for entry in model.store.entries()]
+        if not prompts:
+            raise SystemExit(f"No recordings in {model.store.root}; run the agents with LLM_CASSETTE_MODE=record first")
+        callers = asyncio.Semaphore(args.concurrency)
+        latencies = []
+        received = 0
+
+        async def call(prompt: str):
+            nonlocal received
+            async with callers:
+                started = time.perf_counter()
+                if args.stream:
+                    async for text in stream_content_async(model, prompt):
+                        received += len(text)
+                else:
+                    response = await generate_content_async(model, prompt)
+                    received += len(response.text)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(prompts[i % len(prompts)]) for i in range(args.calls)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        print(f"{args.calls} calls over {len(prompts)} recorded prompts in {elapsed:.2f}s: {args.calls / elapsed:.1f} calls/s, {received / elapsed / 1024:.0f} KiB/s")
+        print(f"latency p50 {latencies[len(latencies) // 2]:.3f}s, p95 {latencies[int(len(latencies) * 0.95)]:.3f}s, max {latencies[-1]:.3f}s")
+        print(f"scheduler: {get_llm_stats()}")
+
+    asyncio.run(benchmark())
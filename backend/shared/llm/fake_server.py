@@ -0,0 +1,121 @@
+# Local stand-in for the Gemini generateContent REST API. Point the agents at it with
+# LLM_API_URL=http://localhost:8090 to exercise the LLM scheduler offline.
+# Run from backend/: python -m shared.llm.fake_server
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_LLM_PORT = int(os.getenv("FAKE_LLM_PORT", "8090"))
+# Seconds before the first token, and the pace at which the rest arrive
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "200"))
+# Tokens in every response; each token is one word of filler text
+FAKE_LLM_RESPONSE_TOKENS = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "200"))
+# Calls served at once; further calls are answered 429 like an exhausted quota
+FAKE_LLM_MAX_CONCURRENCY = int(os.getenv("FAKE_LLM_MAX_CONCURRENCY", "16"))
+FAKE_LLM_STREAM_CHUNK_TOKENS = 20
+
+app = FastAPI(title="Fake LLM", version="1.0.0")
+
+stats = {"calls": 0, "rejected": 0, "active": 0, "max_active": 0, "tokens": 0}
+# Arrival order of the calls' prompts, so tests can check which ones the scheduler let through first
+call_log = []
+
+
+def prompt_of(body: dict) -> str:
+    return "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def payload(text: str, prompt_tokens: int = 0, output_tokens: int = 0) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens
+        }
+    }
+
+
+def response_words() -> list:
+    return [f"token{i}" for i in range(FAKE_LLM_RESPONSE_TOKENS)]
+
+
+async def admit(body: dict):
+    if stats["active"] >= FAKE_LLM_MAX_CONCURRENCY:
+        stats["rejected"] += 1
+        return None
+    prompt = prompt_of(body)
+    stats["calls"] += 1
+    stats["active"] += 1
+    stats["max_active"] = max(stats["max_active"], stats["active"])
+    call_log.append({"prompt": prompt[:200], "at": time.time()})
+    return prompt
+
+
+def finish(prompt: str):
+    stats["active"] -= 1
+    stats["tokens"] += len(prompt) // 4 + FAKE_LLM_RESPONSE_TOKENS
+
+
+def quota_exceeded() -> JSONResponse:
+    return JSONResponse({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, status_code=429)
+
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate_content(model: str, request: Request):
+    prompt = await admit(await request.json())
+    if prompt is None:
+        return quota_exceeded()
+    try:
+        await asyncio.sleep(FAKE_LLM_LATENCY + FAKE_LLM_RESPONSE_TOKENS / FAKE_LLM_TOKENS_PER_SECOND)
+        return payload(" ".join(response_words()), len(prompt) // 4, FAKE_LLM_RESPONSE_TOKENS)
+    finally:
+        finish(prompt)
+
+
+@app.post("/v1beta/models/{model}:streamGenerateContent")
+async def stream_generate_content(model: str, request: Request):
+    prompt = await admit(await request.json())
+    if prompt is None:
+        return quota_exceeded()
+
+    async def events():
+        try:
+            await asyncio.sleep(FAKE_LLM_LATENCY)
+            words = response_words()
+            for start in range(0, len(words), FAKE_LLM_STREAM_CHUNK_TOKENS):
+                chunk = words[start:start + FAKE_LLM_STREAM_CHUNK_TOKENS]
+                await asyncio.sleep(len(chunk) / FAKE_LLM_TOKENS_PER_SECOND)
+                last = start + len(chunk) >= len(words)
+                usage = (len(prompt) // 4, len(words)) if last else ()
+                yield f"data: {json.dumps(payload(' '.join(chunk) + ' ', *usage))}\r\n\r\n"
+        finally:
+            finish(prompt)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "log": call_log[-100:]}
+
+
+@app.post("/reset")
+async def reset():
+    stats.update(calls=0, rejected=0, max_active=0, tokens=0)
+    call_log.clear()
+    return {"reset": True}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=FAKE_LLM_PORT)
@@ -0,0 +1,245 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+
+from shared.llm.cassette import CassetteModel, LLM_CASSETTE_MODE, response_tokens
+from shared.llm.scheduler import (
+    PriorityScheduler, LocalTokenBudget, MongoTokenBudget, LLMDeadlineExceeded,
+    INTERACTIVE, BACKGROUND, LLM_TOKENS_PER_MINUTE
+)
+
+# Upper bound on concurrent Gemini calls per agent process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# "executor" runs the sync SDK call on a bounded thread pool; "native" uses generate_content_async
+LLM_ASYNC_MODE = os.getenv("LLM_ASYNC_MODE", "executor")
+# Longest a single call, or the wait for the next streamed chunk, may take once admitted
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Gemini REST endpoint to call instead of the SDK, e.g. the fake server in shared.llm.fake_server
+LLM_API_URL = os.getenv("LLM_API_URL")
+# "global" shares the tokens-per-minute budget through MongoDB with every agent and worker;
+# "process" keeps it per process (used when there is no database, as in api/flask_api.py)
+LLM_BUDGET_SCOPE = os.getenv("LLM_BUDGET_SCOPE", "global")
+# Seconds from the call until the response is needed, queueing included
+LLM_INTERACTIVE_DEADLINE = float(os.getenv("LLM_INTERACTIVE_DEADLINE", "30"))
+LLM_BACKGROUND_DEADLINE = float(os.getenv("LLM_BACKGROUND_DEADLINE", "600"))
+# Output tokens assumed for a call until the response reports its real usage
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1024"))
+
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="gemini")
+_scheduler: Optional[PriorityScheduler] = None
+_scheduler_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+class RestResponse:
+    """The parts of a Gemini SDK response the agents use"""
+
+    def __init__(self, payload: dict):
+        parts = payload.get("candidates", [{}])[0].get("content", {}).get("parts", [])
+        self.text = "".join(part.get("text", "") for part in parts)
+        self.total_token_count = payload.get("usageMetadata", {}).get("totalTokenCount")
+
+
+class RestModel:
+    """Gemini model called over the generateContent REST API, with the SDK's call signature"""
+
+    def __init__(self, base_url: str, name: str, api_key: Optional[str] = None):
+        self.url = f"{base_url.rstrip('/')}/v1beta/models/{name}"
+        self.params = {"key": api_key} if api_key else {}
+        self.client = httpx.Client(timeout=LLM_TIMEOUT)
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        if not stream:
+            response = self.client.post(f"{self.url}:generateContent", params=self.params, json=body)
+            response.raise_for_status()
+            return RestResponse(response.json())
+        return self._stream(body)
+
+    def _stream(self, body: dict):
+        with self.client.stream("POST", f"{self.url}:streamGenerateContent", params={**self.params, "alt": "sse"}, json=body) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line.startswith("data:"):
+                    yield RestResponse(json.loads(line[5:]))
+
+
+@functools.lru_cache(maxsize=None)
+def get_model(name: str = LLM_MODEL):
+    """The model every agent calls, or None when no model is configured
+
+    With LLM_CASSETTE_MODE set, calls are recorded to or replayed from LLM_CASSETTE_DIR.
+    """
+    model = _configure_model(name)
+    if LLM_CASSETTE_MODE != "off":
+        model = CassetteModel(model, name)
+    return model
+
+
+def _configure_model(name: str):
+    if LLM_API_URL:
+        return RestModel(LLM_API_URL, name, GEMINI_API_KEY)
+    if not GEMINI_API_KEY:
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(name)
+
+
+async def _get_scheduler() -> PriorityScheduler:
+    # Created lazily so it binds to the running event loop, and to the database once connected
+    global _scheduler, _scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _scheduler_loop is not loop:
+        budget = None
+        if LLM_TOKENS_PER_MINUTE > 0:
+            budget = await _get_shared_budget() if LLM_BUDGET_SCOPE == "global" else None
+            budget = budget or LocalTokenBudget()
+        # Another call may have created it while the budget was being looked up
+        if _scheduler_loop is not loop:
+            _scheduler = PriorityScheduler(LLM_MAX_CONCURRENCY, budget)
+            _scheduler_loop = loop
+    return _scheduler
+
+
+async def _get_shared_budget() -> Optional[MongoTokenBudget]:
+    try:
+        from shared.database.connection import db_manager, get_llm_budget_collection
+    except ImportError:  # no MongoDB driver, as in api/flask_api.py
+        return None
+    if db_manager.database is None:
+        return None
+    return MongoTokenBudget(await get_llm_budget_collection())
+
+
+def get_llm_stats() -> dict:
+    return _scheduler.get_stats() if _scheduler else {}
+
+
+def _estimate_tokens(prompt: str) -> int:
+    # Roughly four characters per token in English prose
+    return len(prompt) // 4 + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+def _default_deadline(priority: int) -> float:
+    return LLM_INTERACTIVE_DEADLINE if priority == INTERACTIVE else LLM_BACKGROUND_DEADLINE
+
+
+async def generate_content_async(model, prompt: str, priority: int = BACKGROUND, deadline: Optional[float] = None, **kwargs):
+    """Call model.generate_content without blocking the event loop
+
+    The call waits its turn in the process's priority scheduler; deadline is the number of
+    seconds it may take in total, defaulting by priority. LLMDeadlineExceeded is raised past it.
+    """
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + (deadline if deadline is not None else _default_deadline(priority))
+    scheduler = await _get_scheduler()
+    estimate = _estimate_tokens(prompt)
+    await scheduler.acquire(priority, estimate, expires)
+    used = None
+    try:
+        native = getattr(model, "generate_content_async", None)
+        if LLM_ASYNC_MODE == "native" and native is not None:
+            call = native(prompt, **kwargs)
+        else:
+            call = loop.run_in_executor(_executor, functools.partial(model.generate_content, prompt, **kwargs))
+        try:
+            response = await asyncio.wait_for(call, timeout=min(LLM_TIMEOUT, max(0, expires - loop.time())))
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded("Model call did not finish before its deadline") from None
+        used = response_tokens(response)
+        return response
+    finally:
+        scheduler.release()
+        if used is not None:
+            await scheduler.adjust(used - estimate)
+
+
+_STREAM_DONE = object()
+
+
+async def stream_content_async(model, prompt: str, priority: int = BACKGROUND, deadline: Optional[float] = None, **kwargs):
+    """Yield text chunks of a streamed model.generate_content call without blocking the event loop
+
+    Scheduled like generate_content_async; the deadline covers the whole stream.
+    """
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + (deadline if deadline is not None else _default_deadline(priority))
+    scheduler = await _get_scheduler()
+    estimate = _estimate_tokens(prompt)
+    await scheduler.acquire(priority, estimate, expires)
+    used = None
+
+    def chunk_timeout():
+        remaining = expires - loop.time()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("Model stream did not finish before its deadline")
+        return min(LLM_TIMEOUT, remaining)
+
+    try:
+        native = getattr(model, "generate_content_async", None)
+        if LLM_ASYNC_MODE == "native" and native is not None:
+            response = await asyncio.wait_for(native(prompt, stream=True, **kwargs), timeout=chunk_timeout())
+            async for chunk in response:
+                used = response_tokens(chunk) or used
+                yield chunk.text
+                chunk_timeout()
+            return
+
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            # Runs on the executor thread; hands every chunk back to the event loop
+            try:
+                for chunk in model.generate_content(prompt, stream=True, **kwargs):
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_DONE)
+
+        producer = loop.run_in_executor(_executor, produce)
+        while True:
+            try:
+                item = await asyncio.wait_for(chunks.get(), timeout=chunk_timeout())
+            except asyncio.TimeoutError:
+                raise LLMDeadlineExceeded("Model stream stalled") from None
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            # The final chunk carries the usage of the whole response
+            used = response_tokens(item) or used
+            yield item.text
+        await producer
+    finally:
+        scheduler.release()
+        if used is not None:
+            await scheduler.adjust(used - estimate)
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="llm-scheduler", daemon=True).start()
+        return _sync_loop
+
+
+def generate_content_sync(model, prompt: str, priority: int = BACKGROUND, deadline: Optional[float] = None, **kwargs):
+    """generate_content_async for synchronous callers such as Flask views
+
+    Every synchronous caller in the process shares one scheduler running on a background loop.
+    """
+    call = generate_content_async(model, prompt, priority=priority, deadline=deadline, **kwargs)
+    return asyncio.run_coroutine_threadsafe(call, _get_sync_loop()).result()
@@ -0,0 +1,280 @@
+import functools
+import json
+import re
+from typing import Any, List, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    import orjson
+except ImportError:  # the standard library parser gives the same results, only slower
+    orjson = None
+
+# A dangling object key, possibly followed by its colon, left at the end of truncated output
+DANGLING_KEY_PATTERN = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*\Z', re.S)
+# A bare value cut off mid-token, such as "tru" or "12."
+TRUNCATED_LITERAL_PATTERN = re.compile(r"([\[{,:])\s*[A-Za-z0-9.+-]+\Z")
+CLOSERS = {"{": "}", "[": "]"}
+STRUCTURE_PATTERN = re.compile(r'[{}\[\]"]')
+STRING_SPECIAL_PATTERN = re.compile(r'["\\]')
+MAX_PAYLOAD_CANDIDATES = 5
+# Truncation repairs only look this far back from the end of the payload
+REPAIR_WINDOW = 4096
+
+
+class LLMJSONError(ValueError):
+    """Raised when model output holds no usable JSON, or it fails validation"""
+
+
+class LLMOutputTruncatedError(LLMJSONError):
+    """Raised when model output was cut off and only parses once its open containers are closed
+
+    The repaired value is kept in ``value``; it is missing whatever the model did not
+    get to write, so it must not be stored as a finished result.
+    """
+
+    def __init__(self, value: Any):
+        super().__init__("Model output was truncated")
+        self.value = value
+
+
+def loads(text: str) -> Any:
+    """Parse JSON with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _scan(text: str, start: int):
+    """Find the end of the JSON value opening at text[start]
+
+    Returns (end, open containers, whether the text ended inside a string).
+    """
+    stack: List[str] = []
+    pos = start
+    while True:
+        match = STRUCTURE_PATTERN.search(text, pos)
+        if match is None:
+            return len(text), stack, False
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            # Jump from escape to escape until the closing quote
+            while True:
+                match = STRING_SPECIAL_PATTERN.search(text, pos)
+                if match is None:
+                    return len(text), stack, True
+                pos = match.end()
+                if match.group() == '"':
+                    break
+                pos += 1
+        elif char in CLOSERS:
+            stack.append(char)
+        else:
+            if stack and CLOSERS[stack[-1]] == char:
+                stack.pop()
+            if not stack:
+                return pos, stack, False
+
+
+def _close_truncated(payload: str, stack: List[str], in_string: bool) -> str:
+    """Turn the prefix of a JSON document into a complete one"""
+    if in_string:
+        # A cut-off escape sequence cannot be completed
+        partial_unicode = re.search(r"\\u[0-9a-fA-F]{0,3}\Z", payload)
+        if partial_unicode and _ends_in_escape(payload[:partial_unicode.start() + 1]):
+            payload = payload[:partial_unicode.start()]
+        elif _ends_in_escape(payload):
+            payload = payload[:-1]
+        payload += '"'
+    cut = max(0, len(payload) - REPAIR_WINDOW)
+    head, tail = payload[:cut], payload[cut:]
+    while True:
+        trimmed = tail.rstrip()
+        if trimmed.endswith(","):
+            trimmed = trimmed[:-1]
+        elif stack and stack[-1] == "{" and DANGLING_KEY_PATTERN.search(trimmed):
+            trimmed = DANGLING_KEY_PATTERN.sub(r"\1", trimmed)
+        elif TRUNCATED_LITERAL_PATTERN.search(trimmed) and not _is_complete_literal(trimmed):
+            trimmed = TRUNCATED_LITERAL_PATTERN.sub(r"\1", trimmed)
+        if trimmed == tail:
+            break
+        tail = trimmed
+    return head + tail + "".join(CLOSERS[opener] for opener in reversed(stack))
+
+
+def _ends_in_escape(text: str) -> bool:
+    return (len(text) - len(text.rstrip("\\"))) % 2 == 1
+
+
+def _is_complete_literal(text: str) -> bool:
+    token = re.search(r"[A-Za-z0-9.+-]+\Z", text).group(0)
+    if token in ("true", "false", "null"):
+        return True
+    try:
+        json.loads(token)
+    except ValueError:
+        return False
+    return True
+
+
+def _fenced_block(text: str) -> Optional[str]:
+    """Contents of the first markdown code fence; an unterminated fence runs to the end"""
+    fence = text.find("```")
+    if fence < 0:
+        return None
+    body_start = text.find("\n", fence)
+    if body_start < 0:
+        return None
+    body_end = text.find("```", body_start)
+    return text[body_start + 1:body_end if body_end >= 0 else len(text)]
+
+
+def _payload_starts(text: str):
+    return (match.start() for match in re.finditer(r"[{\[]", text))
+
+
+def extract_json_text(text: str, start: Optional[int] = None) -> str:
+    """Cut the JSON payload out of model output, closing it if the output was truncated
+
+    Markdown fences, leading prose and trailing commentary are dropped. start picks
+    the opening bracket to use instead of the first one.
+    """
+    if start is None:
+        start = next(_payload_starts(text), None)
+        if start is None:
+            raise LLMJSONError("Model output contains no JSON")
+    return _extract_payload(text, start)[0]
+
+
+def _extract_payload(text: str, start: int):
+    """(payload, whether it had to be closed because the output was truncated)"""
+    end, stack, in_string = _scan(text, start)
+    payload = text[start:end]
+    if stack:
+        return _close_truncated(payload, stack, in_string), True
+    return payload, False
+
+
+def repair_json(payload: str) -> str:
+    """Fix the mistakes models make most: trailing commas and raw control characters in strings"""
+    repaired = []
+    in_string = False
+    escaped = False
+    pending_comma = False
+    for char in payload:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\r":
+                char = "\\r"
+            elif char == "\t":
+                char = "\\t"
+            repaired.append(char)
+            continue
+        if char.isspace():
+            repaired.append(char)
+            continue
+        if pending_comma:
+            pending_comma = False
+            if char not in "}]":
+                repaired.append(",")
+        if char == ",":
+            pending_comma = True
+            continue
+        if char == '"':
+            in_string = True
+        repaired.append(char)
+    return "".join(repaired)
+
+
+@functools.lru_cache(maxsize=None)
+def _type_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def validate_llm_json(value: Any, schema) -> Any:
+    """Check value against a pydantic model or type such as List[Model]
+
+    The parsed value itself is returned, so fields outside the schema are kept.
+    """
+    try:
+        _type_adapter(schema).validate_python(value)
+    except ValidationError as e:
+        raise LLMJSONError(f"Model output does not match the expected structure: {e}") from e
+    return value
+
+
+def parse_llm_json(text: str, schema: Optional[Any] = None, allow_truncated: bool = False) -> Any:
+    """Parse model output as JSON, tolerating fences, surrounding prose and trailing commas
+
+    Truncated output raises LLMOutputTruncatedError unless allow_truncated is set, in
+    which case the closed-up prefix is validated and returned like any other value.
+    """
+    try:
+        value = loads(text)
+    except ValueError:
+        value, truncated = _parse_embedded(text)
+        if truncated and not allow_truncated:
+            raise LLMOutputTruncatedError(value)
+    if schema is not None:
+        validate_llm_json(value, schema)
+    return value
+
+
+def _parse_embedded(text: str):
+    """(value, whether the output was truncated)"""
+    fenced = _fenced_block(text)
+    if fenced and re.search(r"[{\[]", fenced):
+        text = fenced
+        try:
+            return loads(text), False
+        except ValueError:
+            pass
+    error = None
+    # Prose before the payload may itself contain brackets, so try a few opening positions
+    for _, start in zip(range(MAX_PAYLOAD_CANDIDATES), _payload_starts(text)):
+        payload, truncated = _extract_payload(text, start)
+        try:
+            return loads(payload), truncated
+        except ValueError:
+            pass
+        try:
+            return loads(repair_json(payload)), truncated
+        except ValueError as e:
+            error = e
+    if error is None:
+        raise LLMJSONError("Model output contains no JSON")
+    raise LLMJSONError(f"Model output is not valid JSON: {error}") from error
+
+
+if __name__ == "__main__":
+    import time
+
+    # Microbenchmark: python json_output.py
+    document = json.dumps({
+        "summary": "x" * 200,
+        "chapters": [{"title": f"Chapter {i}", "content": "Lorem ipsum dolor sit amet. " * 80} for i in range(8)],
+        "flashcards": [{"question": f"Q{i}", "answer": "A" * 100} for i in range(15)],
+    })
+    samples = {
+        "clean": document,
+        "fenced with prose": f"Sure! Here is the course:\n```json\n{document}\n```\nLet me know if you need changes.",
+        "truncated": document[: len(document) * 2 // 3],
+    }
+    runs = 200
+    for name, text in samples.items():
+        start = time.perf_counter()
+        for _ in range(runs):
+            parse_llm_json(text, allow_truncated=True)
+        print(f"{name:>18}: {(time.perf_counter() - start) / runs * 1e6:8.1f} us per parse ({len(text)} bytes)")
+    start = time.perf_counter()
+    for _ in range(runs):
+        json.loads(document)
+    print(f"{'json.loads clean':>18}: {(time.perf_counter() - start) / runs * 1e6:8.1f} us per parse")
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Call priorities; a lower number is admitted first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Model tokens (prompt and output) that may be spent per minute; 0 disables the budget
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+# Share of the budget background calls may not touch, so interactive calls never starve
+LLM_INTERACTIVE_RESERVE = float(os.getenv("LLM_INTERACTIVE_RESERVE", "0.2"))
+# How often a call waiting on the shared budget asks MongoDB again
+LLM_BUDGET_RETRY_SECONDS = float(os.getenv("LLM_BUDGET_RETRY_SECONDS", "1"))
+
+
+class LLMDeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call could not be admitted and answered before its deadline"""
+
+
+class LocalTokenBudget:
+    """Tokens-per-minute budget of this process, as a token bucket"""
+
+    def __init__(self, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, interactive_reserve: float = LLM_INTERACTIVE_RESERVE):
+        self.capacity = tokens_per_minute
+        self.reserve = tokens_per_minute * interactive_reserve
+        self.available = float(tokens_per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    async def take(self, tokens: int, priority: int) -> float:
+        """Spend tokens and return 0, or return how many seconds to wait before asking again"""
+        self._refill()
+        floor = self.reserve if priority > INTERACTIVE else 0
+        # A call larger than the whole budget is let through once the bucket is full
+        needed = min(tokens, self.capacity - floor)
+        if self.available - needed >= floor:
+            self.available -= tokens
+            return 0
+        return (needed + floor - self.available) * 60 / self.capacity
+
+    async def adjust(self, tokens: int):
+        """Correct an earlier take() once the real token count is known"""
+        self._refill()
+        self.available = min(self.capacity, self.available - tokens)
+
+
+class MongoTokenBudget:
+    """Tokens-per-minute budget shared by every process using the same collection
+
+    Usage is counted in fixed one-minute windows, one document per window.
+    """
+
+    def __init__(self, collection, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, interactive_reserve: float = LLM_INTERACTIVE_RESERVE):
+        self.collection = collection
+        self.capacity = tokens_per_minute
+        self.reserve = tokens_per_minute * interactive_reserve
+
+    async def take(self, tokens: int, priority: int) -> float:
+        from pymongo.errors import DuplicateKeyError
+        now = time.time()
+        window = int(now // 60)
+        ceiling = self.capacity - (self.reserve if priority > INTERACTIVE else 0)
+        try:
+            # Matches the window only while the tokens still fit; otherwise the upsert collides
+            # with the existing window document. An oversized call fits an empty window.
+            await self.collection.update_one(
+                {"_id": window, "$or": [{"tokens": {"$lte": ceiling - tokens}}, {"tokens": 0}]},
+                {
+                    "$inc": {"tokens": tokens},
+                    "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(minutes=2)}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Usually a full window, occasionally a lost race to create it: check back soon either way
+            return min(LLM_BUDGET_RETRY_SECONDS, (window + 1) * 60 - now)
+        return 0
+
+    async def adjust(self, tokens: int):
+        await self.collection.update_one({"_id": int(time.time() // 60)}, {"$inc": {"tokens": tokens}})
+
+
+class PriorityScheduler:
+    """Admits model calls in priority order, within a concurrency limit and a token budget
+
+    Calls of equal priority are admitted first come, first served.
+    """
+
+    def __init__(self, max_concurrency: int, budget=None):
+        self.max_concurrency = max_concurrency
+        self.budget = budget
+        self.active = 0
+        self._queue = []
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.admitted = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.expired = 0
+
+    async def acquire(self, priority: int, tokens: int, deadline: float):
+        """Wait for a slot and budget for a call estimated at tokens, until the loop.time() deadline"""
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        loop = asyncio.get_running_loop()
+        admission = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), tokens, admission))
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(admission, timeout=max(0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise LLMDeadlineExceeded("Model call was not admitted before its deadline") from None
+        except asyncio.CancelledError:
+            # Admitted just as the caller was cancelled: hand the slot back
+            if admission.done() and not admission.cancelled():
+                self.release()
+            raise
+        self.admitted[priority] = self.admitted.get(priority, 0) + 1
+
+    def release(self):
+        self.active -= 1
+        self._wakeup.set()
+
+    async def adjust(self, tokens: int):
+        if self.budget is not None and tokens:
+            try:
+                await self.budget.adjust(tokens)
+            except Exception as e:
+                print(f"Failed to correct LLM token budget by {tokens}: {e}")
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue and self.active < self.max_concurrency:
+                entry = heapq.heappop(self._queue)
+                priority, _, tokens, admission = entry
+                if admission.done():
+                    # The caller gave up waiting
+                    continue
+                if self.budget is not None:
+                    try:
+                        wait = await self.budget.take(tokens, priority)
+                    except Exception as e:
+                        # An unreachable budget store must not stop every model call
+                        print(f"LLM token budget unavailable, admitting call: {e}")
+                        wait = 0
+                    if wait:
+                        # Back in its old place; a higher priority arrival still wakes the dispatcher
+                        heapq.heappush(self._queue, entry)
+                        loop.call_later(wait, self._wakeup.set)
+                        break
+                    if admission.done():
+                        await self.adjust(-tokens)
+                        continue
+                self.active += 1
+                admission.set_result(None)
+
+    def get_stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": sum(1 for entry in self._queue if not entry[3].done()),
+            "admitted_interactive": self.admitted.get(INTERACTIVE, 0),
+            "admitted_background": self.admitted.get(BACKGROUND, 0),
+            "expired": self.expired,
+        }
@@ -0,0 +1,87 @@
+from typing import Any, List, Optional
+
+from shared.llm.json_output import loads, parse_llm_json, validate_llm_json
+
+
+class JsonArrayItemStream:
+    """Incrementally extracts the items of one top-level array from streamed JSON text
+
+    For a document like ``{"summary": ..., "chapters": [{...}, {...}]}`` arriving in
+    arbitrary chunks, feed() returns each chapter object as soon as its closing
+    brace has been received, long before the whole document is complete. Items that
+    are not valid JSON, or do not match item_schema, are skipped.
+    """
+
+    def __init__(self, key: str, item_schema: Optional[Any] = None):
+        self.key = key
+        self.item_schema = item_schema
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        # One (bracket, key) entry per open container
+        self._stack: List[tuple] = []
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add text and return the array items completed by it"""
+        self.buffer += chunk
+        items = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                self._pending_key = self._last_string
+            elif char == ",":
+                self._pending_key = None
+            elif char in "{[":
+                in_object = bool(self._stack) and self._stack[-1][0] == "{"
+                self._stack.append((char, self._pending_key if in_object else None))
+                self._pending_key = None
+                depth = len(self._stack)
+                if char == "[" and depth == 2 and self._stack[-1][1] == self.key and not self.done:
+                    self._array_depth = depth
+                elif char == "{" and self._array_depth is not None and depth == self._array_depth + 1:
+                    self._item_start = i
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                depth = len(self._stack)
+                if char == "}" and self._item_start is not None and depth == self._array_depth:
+                    item_text = buffer[self._item_start:i + 1]
+                    self._item_start = None
+                    try:
+                        item = loads(item_text)
+                        if self.item_schema is not None:
+                            validate_llm_json(item, self.item_schema)
+                        items.append(item)
+                    except ValueError:
+                        pass
+                elif char == "]" and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self.done = True
+        self._pos = len(buffer)
+        return items
+
+    def result(self, schema: Optional[Any] = None) -> Any:
+        """Parse everything fed so far as one document; raises LLMJSONError"""
+        return parse_llm_json(self.buffer, schema)
@@ -51,7 +51,8 @@ class CourseContent(BaseModel):
     status: Optional[str] = None
     message: Optional[str] = None
     last_updated: Optional[datetime] = None
-    parsed_content: Optional[Dict[str, Any]] = None
+    counts: Optional[Dict[str, int]] = None  # Number of chapters, flashcards, mcqs and qnas
+    parsed_content: Optional[Dict[str, Any]] = None  # Legacy; sections now live in their own collections
 
 class Course(BaseModel):
     id: Optional[str] = Field(None, alias="_id")
@@ -237,8 +238,57 @@ class APIResponse(BaseModel):
 
 class PaginatedResponse(BaseModel):
     items: List[Any]
-    total: int
-    page: int
+    total: Optional[int] = None  # Not computed by keyset pagination
+    page: Optional[int] = None
     per_page: int
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None  # Pass as cursor= to fetch the next page
+
+# Model output schemas, checked by shared.llm.json_output before generated content is stored
+class GeneratedChapter(BaseModel):
+    title: str
+    content: str
+
+class GeneratedFlashcard(BaseModel):
+    question: str
+    answer: str
+
+class GeneratedMCQ(BaseModel):
+    question: str
+    options: List[str]
+    correct_answer: str
+
+class GeneratedQnA(BaseModel):
+    question: str
+    answer: str
+
+class GeneratedCourse(BaseModel):
+    summary: Optional[str] = None
+    chapters: List[GeneratedChapter] = Field(min_length=1)
+    flashcards: List[GeneratedFlashcard] = []
+    mcqs: List[GeneratedMCQ] = []
+    qnas: List[GeneratedQnA] = []
+
+class ChapterPlan(BaseModel):
+    title: str
+
+class GeneratedCourseOutline(BaseModel):
+    chapters: List[ChapterPlan] = Field(min_length=1)
+
+class GeneratedChapterBody(BaseModel):
+    content: str
+
+class GeneratedFlashcardSet(BaseModel):
+    flashcards: List[GeneratedFlashcard]
+
+class GeneratedMCQSet(BaseModel):
+    mcqs: List[GeneratedMCQ]
+
+class GeneratedQnASet(BaseModel):
+    qnas: List[GeneratedQnA]
+
+class GeneratedInterviewQuestion(BaseModel):
+    question: str
+    type: Optional[str] = None
+    difficulty: Optional[str] = None
@@ -0,0 +1,36 @@
+import os
+from typing import Optional
+
+import httpx
+
+# Pooled client agents use for internal calls, such as course status pings to the gateway
+INTERNAL_HTTP_TIMEOUT = float(os.getenv("INTERNAL_HTTP_TIMEOUT", "2"))
+INTERNAL_HTTP_MAX_CONNECTIONS = int(os.getenv("INTERNAL_HTTP_MAX_CONNECTIONS", "20"))
+INTERNAL_HTTP_MAX_KEEPALIVE = int(os.getenv("INTERNAL_HTTP_MAX_KEEPALIVE", "10"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The process's long-lived internal HTTP client, created on first use
+
+    Keep-alive connections are reused across calls, so a ping per generated chapter
+    does not open a new connection each time. Each process runs a single event loop.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=INTERNAL_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=INTERNAL_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=INTERNAL_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,143 @@
+import json
+import re
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder produces the same bytes, only slower
+    orjson = None
+
+# MongoDB's "_id" is exposed to clients as "id". Both encoders write keys as '"key":'
+# with no whitespace, right after the "{" or "," that opens them. A quote inside a
+# string is always escaped as '\"', so '{"' and ',"' never occur within a string and
+# this pattern matches "_id" keys only, not e.g. the tail of a key 'a"_id'.
+MONGO_ID_KEY = re.compile(rb'([{,])"_id":')
+CLIENT_ID_KEY = rb'\1"id":'
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        # Field by field; nested models come back through here
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode MongoDB documents and API models to JSON in a single pass
+
+    ObjectId becomes a string, datetime an ISO 8601 string and every "_id" key "id",
+    matching what the agents' old serialize_doc produced.
+    """
+    if orjson is not None:
+        encoded = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        encoded = json.dumps(obj, default=_stdlib_default, ensure_ascii=False, separators=(",", ":")).encode()
+    return MONGO_ID_KEY.sub(CLIENT_ID_KEY, encoded)
+
+
+class DocumentResponse(JSONResponse):
+    """JSON response that serializes raw MongoDB documents with dumps()
+
+    Returning one from an endpoint skips FastAPI's jsonable_encoder pass entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+if __name__ == "__main__":
+    import time
+    import uuid
+
+    from fastapi.encoders import jsonable_encoder
+
+    from shared.models.schemas import APIResponse
+
+    def serialize_doc(doc):
+        """The per-agent serializer this module replaces, for comparison"""
+        if doc is None:
+            return None
+        if isinstance(doc, list):
+            return [serialize_doc(d) for d in doc]
+        if isinstance(doc, dict):
+            result = {}
+            for key, value in doc.items():
+                if key == "_id":
+                    result["id"] = str(value)
+                elif isinstance(value, ObjectId):
+                    result[key] = str(value)
+                elif isinstance(value, datetime):
+                    result[key] = value.isoformat()
+                elif isinstance(value, dict):
+                    result[key] = serialize_doc(value)
+                elif isinstance(value, list):
+                    result[key] = serialize_doc(value)
+                else:
+                    result[key] = value
+            return result
+        return doc
+
+    # Microbenchmark: python -m shared.utils.serialization (from backend/)
+    now = datetime.utcnow()
+    course = {
+        "_id": str(uuid.uuid4()),
+        "user_id": str(ObjectId()),
+        "title": "Distributed Systems",
+        "summary": "A course on consensus, replication and partitioning. " * 3,
+        "content": {"status": "complete", "last_updated": now, "counts": {"chapters": 8, "flashcards": 15, "mcqs": 15, "qnas": 8}},
+        "created_at": now,
+        "updated_at": now,
+    }
+    chapters = [
+        {
+            "_id": str(uuid.uuid4()),
+            "course_id": course["_id"],
+            "title": f"Chapter {i}",
+            "content": "Replication keeps copies of data on several nodes. " * 120,
+            "order_number": i,
+            "json_content": {
+                "duration_minutes": 30,
+                "learning_objectives": [f"Objective {j}" for j in range(4)],
+                "examples": [f"Example {j}" for j in range(3)],
+                "key_points": [f"Key point {j}" for j in range(5)],
+            },
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, 9)
+    ]
+    flashcards = [
+        {"_id": ObjectId(), "course_id": course["_id"], "question": f"Question {i}?", "answer": "An answer. " * 10, "tags": ["concepts"], "created_at": now}
+        for i in range(15)
+    ]
+    payload = {**course, "chapters": chapters, "sections": {"flashcards": flashcards}}
+
+    def old_path():
+        data = serialize_doc(course)
+        data["chapters"] = serialize_doc(chapters)
+        data["sections"] = serialize_doc({"flashcards": flashcards})
+        return json.dumps(jsonable_encoder(APIResponse(success=True, data=data)), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def new_path():
+        return DocumentResponse(APIResponse(success=True, data=payload)).body
+
+    assert json.loads(old_path()) == json.loads(new_path()), "serializers disagree"
+    runs = 200
+    for name, path in (("serialize_doc + jsonable_encoder + json", old_path), ("DocumentResponse", new_path)):
+        start = time.perf_counter()
+        for _ in range(runs):
+            body = path()
+        print(f"{name:>40}: {(time.perf_counter() - start) / runs * 1e3:7.3f} ms per response ({len(body)} bytes)")
@@ -0,0 +1,47 @@
+import zipfile
+from typing import IO, List
+
+
+class _Sink:
+    """Write-only file that keeps what was written until it is drained
+
+    It has no tell() or seek(), so zipfile writes sizes after each entry instead of going
+    back to patch its header.
+    """
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class ZipStream:
+    """Zip archive built entry by entry, handing out its bytes as they are produced
+
+    Only the current entry's compressor state and the undrained bytes are held in memory,
+    so an archive of any size can be streamed to a client.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=compression)
+
+    def open(self, name: str) -> IO[bytes]:
+        """Writable file for a new entry; close it before opening the next one"""
+        # Entry sizes are unknown up front, so allow them to exceed 4 GiB
+        return self._zip.open(name, mode="w", force_zip64=True)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._sink.parts)
+        self._sink.parts.clear()
+        return data
+
+    def close(self) -> bytes:
+        """Finish the archive and return its remaining bytes, the central directory included"""
+        self._zip.close()
+        return self.drain()
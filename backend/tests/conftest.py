@@ -0,0 +1,64 @@
+import os
+import sys
+
+import mongomock
+import pytest
+
+# The gateway's modules import each other as top-level modules; everything else imports shared.*
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, "api-gateway")]
+
+
+class AsyncCursor:
+    """Motor-style cursor over a mongomock cursor"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        self._iterator = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncCollection:
+    """The subset of motor's collection API the shared modules use, backed by mongomock"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline):
+        return AsyncCursor(self._collection.aggregate(pipeline))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def mongo_collection():
+    return AsyncCollection(mongomock.MongoClient().db.collection)
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from shared.jobs.queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, retry_delay
+
+
+def expire_lease(collection, job_id):
+    return collection.update_one({"_id": job_id}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_claim_leases_a_job_to_one_worker(mongo_collection):
+    async def scenario():
+        queue = JobQueue(mongo_collection)
+        job_id = await queue.enqueue("course_generation", {"course_id": "c1"})
+        job = await queue.claim("worker-a", ["course_generation"])
+        return job_id, job, await queue.claim("worker-b", ["course_generation"])
+
+    job_id, job, second = asyncio.run(scenario())
+    assert job["_id"] == job_id
+    assert job["status"] == RUNNING
+    assert job["lease_owner"] == "worker-a"
+    assert job["attempts"] == 1
+    assert job["lease_expires_at"] > datetime.utcnow()
+    # Leased and not yet expired, so nobody else gets it
+    assert second is None
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(mongo_collection):
+    async def scenario():
+        queue = JobQueue(mongo_collection)
+        job_id = await queue.enqueue("course_generation", {"course_id": "c1"})
+        await queue.claim("worker-a", ["course_generation"])
+        # worker-a crashed without heartbeating
+        await expire_lease(mongo_collection, job_id)
+        reclaimed = await queue.claim("worker-b", ["course_generation"])
+        stale_heartbeat = await queue.heartbeat(job_id, "worker-a")
+        stale_complete = await queue.complete(job_id, "worker-a")
+        completed = await queue.complete(job_id, "worker-b")
+        return reclaimed, stale_heartbeat, stale_complete, completed, await mongo_collection.find_one({"_id": job_id})
+
+    reclaimed, stale_heartbeat, stale_complete, completed, stored = asyncio.run(scenario())
+    assert reclaimed["lease_owner"] == "worker-b"
+    assert reclaimed["attempts"] == 2
+    assert not stale_heartbeat
+    assert not stale_complete
+    assert completed
+    assert stored["status"] == SUCCEEDED
+    assert stored["lease_owner"] is None
+
+
+def test_heartbeat_keeps_the_lease(mongo_collection):
+    async def scenario():
+        queue = JobQueue(mongo_collection)
+        job_id = await queue.enqueue("course_generation", {})
+        await queue.claim("worker-a", ["course_generation"])
+        await mongo_collection.update_one({"_id": job_id}, {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=1)}})
+        assert await queue.heartbeat(job_id, "worker-a")
+        return await queue.claim("worker-b", ["course_generation"]), await mongo_collection.find_one({"_id": job_id})
+
+    reclaimed, stored = asyncio.run(scenario())
+    assert reclaimed is None
+    assert stored["lease_expires_at"] > datetime.utcnow() + timedelta(seconds=30)
+
+
+def test_failed_attempt_is_retried_with_backoff_then_failed_for_good(mongo_collection):
+    async def scenario():
+        queue = JobQueue(mongo_collection)
+        job_id = await queue.enqueue("course_generation", {}, max_attempts=2)
+        job = await queue.claim("worker-a", ["course_generation"])
+        first = await queue.fail(job, "worker-a", "model timed out")
+        requeued = await mongo_collection.find_one({"_id": job_id})
+        # Not runnable until the backoff has passed
+        assert await queue.claim("worker-a", ["course_generation"]) is None
+        await mongo_collection.update_one({"_id": job_id}, {"$set": {"run_at": datetime.utcnow()}})
+        job = await queue.claim("worker-a", ["course_generation"])
+        second = await queue.fail(job, "worker-a", "model timed out again")
+        return first, requeued, second, await mongo_collection.find_one({"_id": job_id}), await queue.get_stats()
+
+    first, requeued, second, stored, stats = asyncio.run(scenario())
+    assert first == QUEUED
+    assert requeued["run_at"] > datetime.utcnow() + timedelta(seconds=retry_delay(1) - 5)
+    assert second == FAILED
+    assert stored["attempts"] == 2
+    assert stored["last_error"] == "model timed out again"
+    assert stats == {FAILED: 1}
+
+
+def test_claim_only_returns_requested_job_types(mongo_collection):
+    async def scenario():
+        queue = JobQueue(mongo_collection)
+        await queue.enqueue("other", {})
+        return await queue.claim("worker-a", ["course_generation"])
+
+    assert asyncio.run(scenario()) is None
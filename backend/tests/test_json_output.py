@@ -0,0 +1,86 @@
+from typing import List
+
+import pytest
+
+from shared.llm.json_output import LLMJSONError, LLMOutputTruncatedError, parse_llm_json
+from shared.llm.stream_parser import JsonArrayItemStream
+from shared.models.schemas import GeneratedChapter, GeneratedCourse, GeneratedInterviewQuestion
+
+COURSE = '{"summary": "s", "chapters": [{"title": "One", "content": "Body"}]}'
+
+
+@pytest.mark.parametrize("text", [
+    COURSE,
+    f"```json\n{COURSE}\n```",
+    f"Sure! Here is the course you asked for:\n{COURSE}\nLet me know if you need changes.",
+    f"Sure! Here is the course:\n```json\n{COURSE}",
+    'Course (draft) [v1]: {"summary": "s", "chapters": [{"title": "One", "content": "Body",},],}',
+])
+def test_payload_is_recovered_from_surrounding_text(text):
+    assert parse_llm_json(text, GeneratedCourse) == {"summary": "s", "chapters": [{"title": "One", "content": "Body"}]}
+
+
+def test_raw_newlines_in_strings_are_escaped():
+    text = 'Here: {"title": "One", "content": "line one\nline two"}'
+    assert parse_llm_json(text, GeneratedChapter)["content"] == "line one\nline two"
+
+
+def test_fields_outside_the_schema_are_kept():
+    text = '{"title": "One", "content": "Body", "key_points": ["a"]}'
+    assert parse_llm_json(text, GeneratedChapter)["key_points"] == ["a"]
+
+
+@pytest.mark.parametrize("text", [
+    '{"chapters": [{"title": "x", "content": "trunc',
+    '{"chapters": [{"title": "x", "content": "done"}, {"title": "y", "cont',
+    '```json\n{"chapters": [{"title": "x", "content": "done"}], "flashcards": [tr',
+])
+def test_truncated_output_is_reported(text):
+    with pytest.raises(LLMOutputTruncatedError) as error:
+        parse_llm_json(text, GeneratedCourse)
+    # Callers catching LLMJSONError treat it as unusable output
+    assert isinstance(error.value, LLMJSONError)
+    assert error.value.value["chapters"][0]["title"] == "x"
+
+
+def test_truncated_output_can_be_accepted_explicitly():
+    value = parse_llm_json('{"chapters": [{"title": "x", "content": "part\\u00', allow_truncated=True)
+    assert value == {"chapters": [{"title": "x", "content": "part"}]}
+
+
+@pytest.mark.parametrize("text", [
+    "I'm sorry, I can't help with that.",
+    "",
+    "{'single': 'quotes'}",
+])
+def test_output_without_json_is_rejected(text):
+    with pytest.raises(LLMJSONError):
+        parse_llm_json(text)
+
+
+@pytest.mark.parametrize("text, schema", [
+    ('{"summary": "s", "chapters": []}', GeneratedCourse),
+    ('{"chapters": [{"title": "One"}]}', GeneratedCourse),
+    ('{"question": "Q"}', List[GeneratedInterviewQuestion]),
+    ('[{"type": "technical"}]', List[GeneratedInterviewQuestion]),
+])
+def test_output_not_matching_the_schema_is_rejected(text, schema):
+    with pytest.raises(LLMJSONError) as error:
+        parse_llm_json(text, schema)
+    assert not isinstance(error.value, LLMOutputTruncatedError)
+    assert "expected structure" in str(error.value)
+
+
+def test_stream_yields_each_valid_item_once_complete():
+    stream = JsonArrayItemStream("chapters", GeneratedChapter)
+    document = (
+        '```json\n{"summary": "has [brackets] and {braces}", "chapters": ['
+        '{"title": "One", "content": "a \\"quoted\\" }"}, '
+        '{"title": "Missing content"}, '
+        '{"title": "Two", "content": "b"}]}\n```'
+    )
+    items = []
+    for start in range(0, len(document), 7):
+        items.extend(stream.feed(document[start:start + 7]))
+    assert [item["title"] for item in items] == ["One", "Two"]
+    assert stream.done
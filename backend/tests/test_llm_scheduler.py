@@ -0,0 +1,99 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from shared.llm import fake_server, gemini
+from shared.llm.gemini import RestModel, generate_content_async
+from shared.llm.scheduler import BACKGROUND, INTERACTIVE, LLMDeadlineExceeded, LocalTokenBudget, PriorityScheduler
+
+
+@pytest.fixture(scope="module")
+def fake_llm_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def fake_llm(fake_llm_url, monkeypatch):
+    monkeypatch.setattr(fake_server, "FAKE_LLM_LATENCY", 0.2)
+    monkeypatch.setattr(fake_server, "FAKE_LLM_RESPONSE_TOKENS", 5)
+    fake_server.call_log.clear()
+    fake_server.stats.update(calls=0, rejected=0, max_active=0, tokens=0)
+    return RestModel(fake_llm_url, "fake-model")
+
+
+def use_scheduler(monkeypatch, scheduler: PriorityScheduler):
+    # generate_content_async builds one per event loop; hand it this one instead
+    monkeypatch.setattr(gemini, "_scheduler", scheduler)
+    monkeypatch.setattr(gemini, "_scheduler_loop", asyncio.get_running_loop())
+
+
+def test_interactive_calls_are_admitted_before_queued_background_calls(fake_llm, monkeypatch):
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        use_scheduler(monkeypatch, scheduler)
+        running = asyncio.ensure_future(generate_content_async(fake_llm, "running", priority=BACKGROUND))
+        while scheduler.active == 0:
+            await asyncio.sleep(0.01)
+
+        queued = []
+        for prompt, priority in (("background-1", BACKGROUND), ("background-2", BACKGROUND), ("interactive-1", INTERACTIVE), ("interactive-2", INTERACTIVE)):
+            queued.append(asyncio.ensure_future(generate_content_async(fake_llm, prompt, priority=priority)))
+            await asyncio.sleep(0.01)
+        responses = await asyncio.gather(running, *queued)
+        return scheduler, responses
+
+    scheduler, responses = asyncio.run(scenario())
+    assert all(response.text for response in responses)
+    assert [call["prompt"] for call in fake_server.call_log] == [
+        "running", "interactive-1", "interactive-2", "background-1", "background-2",
+    ]
+    assert scheduler.get_stats()["admitted_interactive"] == 2
+    assert scheduler.get_stats()["admitted_background"] == 3
+    assert fake_server.stats["max_active"] == 1
+
+
+def test_call_not_admitted_before_its_deadline_is_dropped(fake_llm, monkeypatch):
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1)
+        use_scheduler(monkeypatch, scheduler)
+        running = asyncio.ensure_future(generate_content_async(fake_llm, "running"))
+        while scheduler.active == 0:
+            await asyncio.sleep(0.01)
+        with pytest.raises(LLMDeadlineExceeded):
+            await generate_content_async(fake_llm, "too late", priority=INTERACTIVE, deadline=0.05)
+        await running
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.expired == 1
+    assert [call["prompt"] for call in fake_server.call_log] == ["running"]
+
+
+def test_background_calls_leave_the_interactive_reserve(fake_llm, monkeypatch):
+    async def scenario():
+        # Every call is estimated at LLM_EXPECTED_OUTPUT_TOKENS plus its prompt
+        estimate = gemini._estimate_tokens("interactive")
+        budget = LocalTokenBudget(tokens_per_minute=estimate * 4, interactive_reserve=0.5)
+        budget.available = estimate * 2
+        scheduler = PriorityScheduler(max_concurrency=4, budget=budget)
+        use_scheduler(monkeypatch, scheduler)
+        with pytest.raises(LLMDeadlineExceeded):
+            await generate_content_async(fake_llm, "background", priority=BACKGROUND, deadline=0.2)
+        await generate_content_async(fake_llm, "interactive", priority=INTERACTIVE)
+
+    asyncio.run(scenario())
+    assert [call["prompt"] for call in fake_server.call_log] == ["interactive"]
@@ -0,0 +1,60 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from shared.database.pagination import InvalidCursorError, decode_cursor, encode_cursor, paginate
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("doc_id", ["course-1", ObjectId()])
+def test_cursor_round_trip(doc_id):
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123000)
+    assert decode_cursor(encode_cursor({"_id": doc_id, "created_at": created_at})) == (created_at, doc_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor(["a list"]),
+    raw_cursor({"c": "2024-05-01T12:00:00"}),
+    raw_cursor({"c": "yesterday", "i": "course-1", "o": False}),
+    raw_cursor({"c": "2024-05-01T12:00:00", "i": "not-an-object-id", "o": True}),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_document_once_newest_first(mongo_collection):
+    start = datetime(2024, 1, 1)
+    docs = [
+        # Pairs share a timestamp, so the _id tie-breaker decides their order
+        {"_id": f"course-{i:02d}", "user_id": "user-1", "title": f"Course {i}", "created_at": start + timedelta(minutes=i // 2)}
+        for i in range(7)
+    ]
+    docs.append({"_id": "other", "user_id": "user-2", "title": "Other", "created_at": start})
+
+    async def scenario():
+        await mongo_collection.insert_many(docs)
+        pages, cursor = [], None
+        while True:
+            page = await paginate(mongo_collection, {"user_id": "user-1"}, {"title": 1}, cursor, limit=3)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    pages = asyncio.run(scenario())
+    assert [len(page.items) for page in pages] == [3, 3, 1]
+    assert [page.has_prev for page in pages] == [False, True, True]
+    assert pages[-1].next_cursor is None
+    ids = [item["_id"] for page in pages for item in page.items]
+    assert ids == [f"course-{i:02d}" for i in reversed(range(7))]
+    # created_at was only fetched to build the cursor
+    assert all(set(item) == {"_id", "title"} for page in pages for item in page.items)
@@ -0,0 +1,54 @@
+import math
+
+import pytest
+from fastapi import HTTPException
+
+import main as gateway
+from rate_limit import ROUTE_COSTS, TokenBucketLimiter
+
+
+def test_bucket_admits_until_empty_then_reports_wait():
+    limiter = TokenBucketLimiter(capacity=10, refill_rate=2)
+    assert limiter.acquire("user-1", 6) == 0
+    assert limiter.acquire("user-1", 4) == 0
+    retry_after = limiter.acquire("user-1", 3)
+    # Three tokens at two per second
+    assert retry_after == pytest.approx(1.5, abs=0.01)
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_buckets_are_per_user():
+    limiter = TokenBucketLimiter(capacity=5, refill_rate=1)
+    assert limiter.acquire("user-1", 5) == 0
+    assert limiter.acquire("user-1", 1) > 0
+    assert limiter.acquire("user-2", 5) == 0
+
+
+def test_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(capacity=10, refill_rate=1, shards=1)
+    assert limiter.acquire("user-1", 10) == 0
+    shard = limiter._shard_for("user-1")
+    tokens, updated = shard.buckets["user-1"]
+    shard.buckets["user-1"] = (tokens, updated - 4)
+    assert limiter.acquire("user-1", 4) == 0
+    assert limiter.acquire("user-1", 1) > 0
+
+
+def test_cost_above_capacity_charges_a_full_bucket():
+    limiter = TokenBucketLimiter(capacity=10, refill_rate=1)
+    assert limiter.acquire("user-1", 50) == 0
+    assert limiter.acquire("user-1", 1) > 0
+
+
+def test_rate_limited_dependency_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(gateway, "rate_limiter", TokenBucketLimiter(capacity=ROUTE_COSTS["export"], refill_rate=0.5))
+    dependency = gateway.rate_limited("export")
+
+    assert dependency(user_id="user-1") == "user-1"
+    with pytest.raises(HTTPException) as error:
+        dependency(user_id="user-1")
+    assert error.value.status_code == 429
+    retry_after = int(error.value.headers["Retry-After"])
+    assert retry_after == math.ceil(ROUTE_COSTS["export"] / 0.5)
+    # Other users are unaffected
+    assert dependency(user_id="user-2") == "user-2"
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import AgentGuard, AgentUnavailableError, CircuitBreaker
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, half_open_probes=1)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 1 <= breaker.retry_after() <= 30
+
+
+def test_breaker_half_opens_after_reset_timeout_and_limits_probes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_probes=1)
+    open_breaker(breaker)
+    breaker.opened_at = time.monotonic() - 31
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time while half-open
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_probes=1)
+    open_breaker(breaker)
+    breaker.opened_at = time.monotonic() - 31
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30, half_open_probes=1)
+    open_breaker(breaker)
+    breaker.opened_at = time.monotonic() - 31
+    assert breaker.allow()
+
+    # A single failure while half-open is enough
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow()
+
+
+def test_guard_rejects_calls_while_open(monkeypatch):
+    monkeypatch.setenv("TEST_AGENT_FAILURE_THRESHOLD", "2")
+
+    async def scenario():
+        guard = AgentGuard("test-agent")
+        for _ in range(2):
+            started = await guard.acquire()
+            guard.release("GET", started, success=False)
+        with pytest.raises(AgentUnavailableError) as error:
+            await guard.acquire()
+        return guard, error.value
+
+    guard, error = asyncio.run(scenario())
+    assert error.reason == "circuit open"
+    assert guard.rejected_open == 1
+    assert guard.in_flight == 0
+
+
+def test_guard_bulkhead_rejects_when_full_until_a_slot_is_released(monkeypatch):
+    monkeypatch.setenv("TEST_AGENT_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("TEST_AGENT_QUEUE_TIMEOUT", "0.01")
+
+    async def scenario():
+        guard = AgentGuard("test-agent")
+        started = await guard.acquire()
+        with pytest.raises(AgentUnavailableError) as error:
+            await guard.acquire()
+        # A streamed response records its outcome first and gives the slot back when it closes
+        guard.record("GET", started, success=True)
+        assert guard.in_flight == 1
+        guard.release_slot()
+        await guard.acquire()
+        return guard, error.value
+
+    guard, error = asyncio.run(scenario())
+    assert error.reason == "too many concurrent requests"
+    assert guard.rejected_full == 1
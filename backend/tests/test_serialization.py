@@ -0,0 +1,64 @@
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from shared.models.schemas import APIResponse
+from shared.utils import serialization
+from shared.utils.serialization import DocumentResponse, dumps
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_mongo_types_are_encoded(encoder):
+    object_id = ObjectId()
+    created_at = datetime(2024, 5, 1, 12, 30)
+    assert json.loads(dumps({"user_id": object_id, "created_at": created_at})) == {
+        "user_id": str(object_id),
+        "created_at": "2024-05-01T12:30:00",
+    }
+
+
+def test_id_keys_are_renamed_at_every_depth(encoder):
+    doc = {"_id": "course-1", "chapters": [{"_id": "chapter-1"}], "content": {"nested": {"_id": ObjectId("0" * 24)}}}
+    assert json.loads(dumps(doc)) == {"id": "course-1", "chapters": [{"id": "chapter-1"}], "content": {"nested": {"id": "0" * 24}}}
+
+
+def test_only_real_id_keys_are_renamed(encoder):
+    doc = {
+        "_id": "course-1",
+        'a"_id': 1,
+        'b\\"_id': 2,
+        "text": '{"_id": "inside a string"}',
+        "compact": '{"_id":1,"_id":2}',
+        "ends_with_backslash": "a\\",
+        "x_id": 3,
+    }
+    decoded = json.loads(dumps(doc))
+    assert decoded == {
+        "id": "course-1",
+        'a"_id': 1,
+        'b\\"_id': 2,
+        "text": '{"_id": "inside a string"}',
+        "compact": '{"_id":1,"_id":2}',
+        "ends_with_backslash": "a\\",
+        "x_id": 3,
+    }
+
+
+def test_document_response_renders_models_and_documents(encoder):
+    body = DocumentResponse(APIResponse(success=True, data={"_id": ObjectId("1" * 24), "title": "Course"})).body
+    assert json.loads(body) == {
+        "success": True,
+        "data": {"id": "1" * 24, "title": "Course"},
+        "message": None,
+        "error": None,
+    }
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"course": "c1"}
+
+        waiters = [asyncio.ensure_future(flights.do("c1", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, flights.get_stats()
+
+    calls, results, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert stats["executed"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.do("a", lambda: fetch("a")), flights.do("b", lambda: fetch("b")))
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        flights = SingleFlight()
+        attempts = 0
+        release = asyncio.Event()
+
+        async def failing():
+            nonlocal attempts
+            attempts += 1
+            await release.wait()
+            raise RuntimeError("agent down")
+
+        waiters = [asyncio.ensure_future(flights.do("c1", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        # The next call after a failure runs again rather than replaying the error
+        async def succeeding():
+            return "ok"
+
+        return attempts, results, await flights.do("c1", succeeding)
+
+    attempts, results, retried = asyncio.run(scenario())
+    assert attempts == 1
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("c1", fetch))
+        second = asyncio.ensure_future(flights.do("c1", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import main as gateway
+from token_cache import RevokedTokenSet, VerifiedTokenCache
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_cache_hit_after_put():
+    cache = VerifiedTokenCache()
+    assert cache.get("token") is None
+    cache.put("token", "user-1", time.time() + 60)
+    assert cache.get("token") == "user-1"
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_cache_drops_expired_tokens():
+    cache = VerifiedTokenCache()
+    cache.put("expired", "user-1", time.time() - 1)
+    assert cache.get("expired") is None
+    cache._entries["stale"] = ("user-1", time.time() - 1)
+    assert cache.get("stale") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2)
+    expires = time.time() + 60
+    cache.put("a", "user-a", expires)
+    cache.put("b", "user-b", expires)
+    cache.get("a")
+    cache.put("c", "user-c", expires)
+    assert cache.get("b") is None
+    assert cache.get("a") == "user-a"
+    assert cache.get("c") == "user-c"
+
+
+def test_revoked_set_holds_tokens_until_expiry():
+    revoked = RevokedTokenSet()
+    revoked.revoke("live", time.time() + 60)
+    revoked.revoke("expired", time.time() - 1)
+    assert revoked.is_revoked("live")
+    assert not revoked.is_revoked("expired")
+    revoked._entries["lapsed"] = time.time() - 1
+    assert not revoked.is_revoked("lapsed")
+
+
+def test_revoked_set_evicts_soonest_expiry_when_full():
+    revoked = RevokedTokenSet(max_size=2)
+    now = time.time()
+    revoked.revoke("late", now + 300)
+    revoked.revoke("soon", now + 60)
+    revoked.revoke("later", now + 600)
+    assert not revoked.is_revoked("soon")
+    assert revoked.is_revoked("late")
+    assert revoked.is_revoked("later")
+
+
+def test_verify_token_serves_repeat_requests_from_cache(monkeypatch):
+    monkeypatch.setattr(gateway, "token_cache", VerifiedTokenCache())
+    token = gateway.create_access_token({"sub": "user@example.com"})
+
+    assert gateway.verify_token(bearer(token)) == "user@example.com"
+    # A cache hit never reaches jwt.decode
+    monkeypatch.setattr(gateway.jwt, "decode", lambda *args, **kwargs: pytest.fail("decoded again"))
+    assert gateway.verify_token(bearer(token)) == "user@example.com"
+    assert gateway.token_cache.get_stats()["hits"] == 1
+
+
+def test_verify_token_rejects_expired_and_tampered_tokens(monkeypatch):
+    monkeypatch.setattr(gateway, "token_cache", VerifiedTokenCache())
+    expired = gateway.create_access_token({"sub": "user@example.com"}, timedelta(seconds=-1))
+    tampered = jwt.encode({"sub": "user@example.com"}, "not-the-secret", algorithm="HS256")
+    for token in (expired, tampered):
+        with pytest.raises(HTTPException) as error:
+            gateway.verify_token(bearer(token))
+        assert error.value.status_code == 401
+
+
+def test_sign_out_rejects_the_token_afterwards(monkeypatch):
+    monkeypatch.setattr(gateway, "token_cache", VerifiedTokenCache())
+    monkeypatch.setattr(gateway, "revoked_tokens", RevokedTokenSet())
+    token = gateway.create_access_token({"sub": "user@example.com"})
+    other = gateway.create_access_token({"sub": "other@example.com"})
+    user_id = gateway.verify_token(bearer(token))
+    gateway.verify_token(bearer(other))
+
+    asyncio.run(gateway.sign_out(user_id, bearer(token)))
+
+    # Still validly signed, and would otherwise be decoded and cached again
+    with pytest.raises(HTTPException) as error:
+        gateway.verify_token(bearer(token))
+    assert error.value.status_code == 401
+    assert gateway.verify_token(bearer(other)) == "other@example.com"
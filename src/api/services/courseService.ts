@@ -1,5 +1,5 @@
 import { apiClient } from '../client';
-import { CourseType } from '../../types';
+import { CourseType, PageType } from '../../types';
 
 export interface CourseGenerationRequest {
   course_name: string;
@@ -21,9 +21,10 @@ export const courseService = {
     return response;
   },
 
-  async getCourses(): Promise<CourseType[]> {
-    const response = await apiClient.get('/courses');
-    return response.data || [];
+  async getCourses(cursor?: string): Promise<PageType<CourseType>> {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await apiClient.get(`/courses${query}`);
+    return response.data;
   },
 
   async getCourse(courseId: string): Promise<CourseType> {
@@ -1,5 +1,5 @@
 import { apiClient } from '../client';
-import { MockInterviewType, InterviewQuestionType, InterviewAnalysisType } from '../../types';
+import { MockInterviewType, InterviewQuestionType, InterviewAnalysisType, PageType } from '../../types';
 
 export interface InterviewStartRequest {
   job_role: string;
@@ -21,9 +21,10 @@ export const interviewService = {
     return response;
   },
 
-  async getInterviews(): Promise<MockInterviewType[]> {
-    const response = await apiClient.get('/interviews');
-    return response.data || [];
+  async getInterviews(cursor?: string): Promise<PageType<MockInterviewType>> {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await apiClient.get(`/interviews${query}`);
+    return response.data;
   },
 
   async getInterview(interviewId: string): Promise<MockInterviewType & { questions: InterviewQuestionType[] }> {
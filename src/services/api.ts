@@ -70,8 +70,16 @@ export const createCourse = async (
 
 export const getAllCourses = async (userId?: string): Promise<CourseType[]> => {
   try {
-    const response = await apiClient.get('/courses');
-    return response.data || [];
+    // /courses is keyset-paginated; follow next_cursor until every page is read
+    const courses: CourseType[] = [];
+    let cursor: string | null = null;
+    do {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await apiClient.get(`/courses${query}`);
+      courses.push(...(response.data?.items || []));
+      cursor = response.data?.next_cursor || null;
+    } while (cursor);
+    return courses;
   } catch (error) {
     console.error("Error fetching courses:", error);
     return [];
@@ -127,3 +127,12 @@ export type InterviewAnalysisType = {
   }[];
   created_at: string;
 };
+
+// One page of a keyset-paginated listing; pass next_cursor as cursor= for the next page
+export type PageType<T> = {
+  items: T[];
+  per_page: number;
+  has_next: boolean;
+  has_prev: boolean;
+  next_cursor: string | null;
+};